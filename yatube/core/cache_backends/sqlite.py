@@ -0,0 +1,221 @@
+"""Кэш в файле SQLite, общий для всех процессов одного узла.
+
+В отличие от LocMemCache, все воркеры видят один и тот же тёплый кэш.
+Файл открывается в режиме WAL, поэтому чтения не ждут записей.
+Размер ограничен MAX_ENTRIES: при переполнении вытесняются записи,
+к которым дольше всего не обращались (LRU). Записи считаются не при
+каждой записи, а раз в CULL_EVERY записей процесса (опция OPTIONS), так
+что кэш может ненадолго превысить предел на несколько сотен записей.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from core import metrics
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL,'
+    ' expires REAL,'
+    ' accessed REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+)
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+)
+# Время обращения обновляется не чаще раза в ACCESS_RESOLUTION секунд:
+# для LRU такой точности достаточно, а чтения почти не пишут в файл.
+ACCESS_RESOLUTION = 30
+BUSY_TIMEOUT = 5
+# COUNT(*) проходит весь индекс: проверяем размер не на каждой записи.
+CULL_EVERY = 100
+
+# Django создаёт экземпляр кэша в каждом потоке: счётчики процесса
+# хранятся здесь, по одному набору на файл кэша.
+_counters = Counter()
+_counters_lock = threading.Lock()
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._cull_every = int(
+            params.get('OPTIONS', {}).get('CULL_EVERY', CULL_EVERY)
+        )
+
+    def _count(self, name):
+        with _counters_lock:
+            _counters[self._path, name] += 1
+            return _counters[self._path, name]
+
+    def _counter(self, name):
+        with _counters_lock:
+            return _counters[self._path, name]
+
+    @property
+    def _db(self):
+        # Соединение своё у каждого потока и у каждого процесса после fork.
+        pid, connection = getattr(self._local, 'connection', (None, None))
+        if pid != os.getpid():
+            connection = sqlite3.connect(
+                self._path, timeout=BUSY_TIMEOUT, isolation_level=None
+            )
+            for statement in PRAGMAS + SCHEMA:
+                connection.execute(statement)
+            self._local.connection = (os.getpid(), connection)
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        row = self._db.execute(
+            'SELECT value, expires, accessed FROM cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            self._count('misses')
+            metrics.incr('cache_misses')
+            return default
+        self._count('hits')
+        metrics.incr('cache_hits')
+        if now - row[2] > ACCESS_RESOLUTION:
+            self._db.execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?', (now, key)
+            )
+        return pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        self._write(
+            'INSERT OR REPLACE INTO cache (key, value, expires, accessed) '
+            'VALUES (?, ?, ?, ?)',
+            key, value, timeout,
+        )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        return self._write(
+            'INSERT OR IGNORE INTO cache (key, value, expires, accessed) '
+            'VALUES (?, ?, ?, ?)',
+            key, value, timeout,
+        )
+
+    def _write(self, statement, key, value, timeout):
+        now = time.time()
+        value = pickle.dumps(value, self.pickle_protocol)
+        with self._transaction() as db:
+            # Просроченная запись не должна мешать add().
+            db.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?', (key, now)
+            )
+            cursor = db.execute(
+                statement,
+                (key, value, self.get_backend_timeout(timeout), now),
+            )
+            self._cull(db, now)
+        return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        cursor = self._db.execute(
+            'UPDATE cache SET expires = ? '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        cursor = self._db.execute('DELETE FROM cache WHERE key = ?', (key,))
+        return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        row = self._db.execute(
+            'SELECT 1 FROM cache '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def incr(self, key, delta=1, version=None):
+        """Атомарное увеличение: поколения страниц меняют все процессы."""
+        key = self._key(key, version)
+        with self._transaction() as db:
+            row = db.execute(
+                'SELECT value FROM cache '
+                'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            db.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(value, self.pickle_protocol), key),
+            )
+        return value
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединения живут всё время работы потока: открывать файл и
+        # выставлять PRAGMA на каждый запрос дороже, чем держать его.
+        pass
+
+    def stats(self):
+        """Счётчики попаданий этого процесса и размер общего кэша."""
+        entries, = self._db.execute('SELECT COUNT(*) FROM cache').fetchone()
+        return {
+            'hits': self._counter('hits'),
+            'misses': self._counter('misses'),
+            'entries': entries,
+        }
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE берёт блокировку записи сразу: два читателя,
+        # одновременно ставшие писателями, не упрутся друг в друга.
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _cull(self, db, now):
+        if self._count('writes') % self._cull_every:
+            return
+        entries, = db.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if entries <= self._max_entries:
+            return
+        db.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        if self._cull_frequency == 0:
+            db.execute('DELETE FROM cache')
+            return
+        entries, = db.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if entries > self._max_entries:
+            db.execute(
+                'DELETE FROM cache WHERE key IN '
+                '(SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                (entries // self._cull_frequency,),
+            )
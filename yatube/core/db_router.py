@@ -0,0 +1,82 @@
+"""Чтение с реплик, запись в основную базу.
+
+Запросы на чтение расходятся по ``REPLICA_DATABASES`` случайным
+образом. В основную базу они идут, если идёт транзакция, если
+приложение всегда читает оттуда (сессии) или если запрос закреплён
+за ней ``ReplicaPinningMiddleware`` после недавней записи, а также
+внутри ``primary()``: так строятся страницы для кэша, который после
+сброса поколения не должен сохранить отставшие данные реплики.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Сессию нужно прочитать до того, как станет ясно, закреплён ли запрос.
+PRIMARY_ONLY_APPS = ('sessions',)
+
+_state = threading.local()
+
+
+@contextmanager
+def pinning(pinned=False):
+    """Состояние запроса: закреплён ли он и была ли в нём запись."""
+    previous = getattr(_state, 'current', None)
+    state = _state.current = Pinning(pinned)
+    try:
+        yield state
+    finally:
+        _state.current = previous
+
+
+@contextmanager
+def primary():
+    """Чтения внутри блока идут в основную базу."""
+    state = getattr(_state, 'current', None)
+    if state is None:
+        with pinning(pinned=True):
+            yield
+        return
+    pinned, state.pinned = state.pinned, True
+    try:
+        yield
+    finally:
+        state.pinned = pinned or state.wrote
+
+
+class Pinning:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        state = getattr(_state, 'current', None)
+        if (
+            not replicas
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or (state is not None and state.pinned)
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = getattr(_state, 'current', None)
+        if state is not None:
+            # Дальнейшие чтения этого запроса тоже из основной базы.
+            state.wrote = state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,127 @@
+import http.client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+)
+from django.utils.module_loading import import_string
+
+from core.metrics import percentile
+
+CHUNK = 4096
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Поднимает WSGI-приложение в многопоточном сервере и нагружает его '
+        'параллельными клиентами, в том числе медленными. Печатает '
+        'пропускную способность и хвосты задержек (p50/p95/p99). '
+        'С --address нагружает уже запущенный сервер (например, ASGI) '
+        'теми же клиентами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*', default=['/'],
+            help='Адреса для нагрузки, по умолчанию главная.'
+        )
+        parser.add_argument(
+            '--app',
+            help='Путь к WSGI-приложению, по умолчанию WSGI_APPLICATION.'
+        )
+        parser.add_argument(
+            '--address',
+            help='host:port уже запущенного сервера; своё приложение '
+                 'тогда не поднимается.'
+        )
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument(
+            '--requests', type=int, default=20,
+            help='Сколько запросов делает каждый клиент.'
+        )
+        parser.add_argument(
+            '--slow', type=float, default=0.0,
+            help='Пауза в секундах между чтениями блоков ответа: '
+                 'так ведут себя клиенты на медленной сети.'
+        )
+
+    def handle(self, *args, **options):
+        if options['address']:
+            host, _, port = options['address'].rpartition(':')
+            if not host or not port.isdigit():
+                raise CommandError('Адрес нужен в виде host:port.')
+            self.run(host, int(port), options)
+            return
+        app = import_string(options['app']) if options['app'] \
+            else get_internal_wsgi_application()
+        server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler)
+        server.set_app(app)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            self.run(*server.server_address[:2], options)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def run(self, host, port, options):
+        for path in options['paths']:
+            self.report(path, self.load(host, port, path, options))
+
+    def load(self, host, port, path, options):
+        def client(_):
+            timings, errors = [], 0
+            connection = http.client.HTTPConnection(host, port)
+            for _ in range(options['requests']):
+                started = time.perf_counter()
+                try:
+                    connection.request('GET', path)
+                    response = connection.getresponse()
+                    while response.read(CHUNK):
+                        time.sleep(options['slow'])
+                except (OSError, http.client.HTTPException):
+                    errors += 1
+                    connection.close()
+                    continue
+                if response.status >= 500:
+                    errors += 1
+                timings.append(time.perf_counter() - started)
+            connection.close()
+            return timings, errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['clients']) as pool:
+            results = list(pool.map(client, range(options['clients'])))
+        elapsed = time.perf_counter() - started
+        timings = sorted(t for result, _ in results for t in result)
+        return {
+            'elapsed': elapsed,
+            'timings': timings,
+            'errors': sum(errors for _, errors in results),
+        }
+
+    def report(self, path, result):
+        timings = result['timings']
+        self.stdout.write(self.style.MIGRATE_HEADING(path))
+        if not timings:
+            self.stdout.write(f'все запросы с ошибкой: {result["errors"]}')
+            return
+        p50, p95, p99 = (
+            percentile(timings, fraction) for fraction in (0.5, 0.95, 0.99)
+        )
+        self.stdout.write(
+            f'запросов: {len(timings)}, ошибок: {result["errors"]}, '
+            f'{len(timings) / result["elapsed"]:.1f} в секунду\n'
+            f'p50 {p50 * 1000:.1f} мс, '
+            f'p95 {p95 * 1000:.1f} мс, '
+            f'p99 {p99 * 1000:.1f} мс, '
+            f'max {timings[-1] * 1000:.1f} мс'
+        )
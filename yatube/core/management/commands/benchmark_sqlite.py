@@ -0,0 +1,171 @@
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.metrics import percentile
+from core.sqlite import apply_pragmas
+from posts.models import Comment, Post
+
+# Стандартный режим Django: журнал отката, остальное по умолчанию.
+ROLLBACK_JOURNAL = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+def connect(path, pragmas):
+    db = sqlite3.connect(
+        path, timeout=settings.SQLITE_TIMEOUT, isolation_level=None
+    )
+    apply_pragmas(db, pragmas)
+    return db
+
+
+def reader(path, pragmas, read, stop, results):
+    db = connect(path, pragmas)
+    timings, errors = [], 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            db.execute(*read).fetchall()
+        except sqlite3.OperationalError:
+            errors += 1
+            continue
+        timings.append(time.perf_counter() - started)
+    db.close()
+    results.put((timings, 0, errors))
+
+
+def writer(path, pragmas, write, stop, results, hold):
+    db = connect(path, pragmas)
+    writes, errors = 0, 0
+    while not stop.is_set():
+        try:
+            db.execute('BEGIN')
+            db.execute(*write)
+            time.sleep(hold)
+            db.execute('COMMIT')
+        except sqlite3.OperationalError:
+            errors += 1
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            continue
+        writes += 1
+    db.close()
+    results.put(([], writes, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает копию базы параллельными чтениями главной страницы и '
+        'записями комментариев: сначала с журналом отката, затем с '
+        'SQLITE_PRAGMAS (WAL). Печатает задержки читателей и скорость '
+        'записи. Запускайте на заполненной базе (seed_data).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=1)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument(
+            '--hold', type=float, default=0.005,
+            help='Сколько секунд писатель держит транзакцию открытой '
+                 '(работа сигналов, счётчиков и т. п.).'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда только для баз SQLite.')
+        post = Post.objects.order_by('-pub_date').first()
+        if post is None:
+            raise CommandError('База пуста: сначала запустите seed_data.')
+        # Тот же запрос, что у главной; плейсхолдеры Django -> sqlite3.
+        read_sql, read_params = Post.objects.for_feed()[
+            :10
+        ].query.sql_with_params()
+        read = (read_sql.replace('%s', '?'), read_params)
+        write = (
+            f'INSERT INTO {Comment._meta.db_table} '
+            '(post_id, author_id, text, created, active) '
+            'VALUES (?, ?, ?, ?, 0)',
+            (post.pk, post.author_id, 'Нагрузка',
+             connection.ops.adapt_datetimefield_value(timezone.now())),
+        )
+        self.stdout.write(
+            f'{"режим":<10}{"чтений/с":>10}{"p50, мс":>10}{"p99, мс":>10}'
+            f'{"max, мс":>10}{"записей/с":>11}{"ошибок":>8}'
+        )
+        for label, pragmas in (
+            ('rollback', ROLLBACK_JOURNAL),
+            ('wal', settings.SQLITE_PRAGMAS),
+        ):
+            # Копия рядом с базой: на той же файловой системе и с тем же
+            # fsync, что у настоящей.
+            directory = tempfile.TemporaryDirectory(dir=self.directory())
+            with directory as name:
+                path = os.path.join(name, 'db.sqlite3')
+                self.copy_database(path)
+                result = self.run(path, pragmas, read, write, options)
+            self.report(label, result, options['seconds'])
+
+    def directory(self):
+        if connection.is_in_memory_db():
+            return None
+        return os.path.dirname(connection.settings_dict['NAME'])
+
+    def copy_database(self, path):
+        target = sqlite3.connect(path)
+        try:
+            connection.ensure_connection()
+            connection.connection.backup(target)
+        finally:
+            target.close()
+
+    def run(self, path, pragmas, read, write, options):
+        connect(path, pragmas).close()
+        # Процессы, как воркеры сервера: потоки одного процесса мерили
+        # бы в основном ожидание GIL, а не блокировки SQLite.
+        context = multiprocessing.get_context('fork')
+        stop, results = context.Event(), context.Queue()
+        workers = [
+            context.Process(target=reader, args=(path, pragmas, read, stop,
+                                                 results))
+            for _ in range(options['readers'])
+        ] + [
+            context.Process(target=writer, args=(path, pragmas, write, stop,
+                                                 results, options['hold']))
+            for _ in range(options['writers'])
+        ]
+        for worker in workers:
+            worker.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        result = {'reads': [], 'writes': 0, 'errors': 0}
+        for _ in workers:
+            timings, writes, errors = results.get()
+            result['reads'].extend(timings)
+            result['writes'] += writes
+            result['errors'] += errors
+        for worker in workers:
+            worker.join()
+        result['reads'].sort()
+        return result
+
+    def report(self, label, result, seconds):
+        reads = result['reads']
+        if not reads:
+            self.stdout.write(f'{label:<10}чтений нет, ошибок: '
+                              f'{result["errors"]}')
+            return
+        p99 = percentile(reads, 0.99)
+        self.stdout.write(
+            f'{label:<10}{len(reads) / seconds:>10.0f}'
+            f'{statistics.median(reads) * 1000:>10.2f}'
+            f'{p99 * 1000:>10.2f}{reads[-1] * 1000:>10.2f}'
+            f'{result["writes"] / seconds:>11.0f}{result["errors"]:>8}'
+        )
@@ -0,0 +1,64 @@
+import copy
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from core import metrics
+from core.template_loading import warm
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+PROFILES = (
+    ('без кэша', LOADERS),
+    ('кэширующий', [('django.template.loaders.cached.Loader', LOADERS)]),
+)
+
+
+def with_loaders(loaders):
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['APP_DIRS'] = False
+    templates[0]['OPTIONS']['loaders'] = loaders
+    return templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время отрисовки шаблонов на запрос с обычным и с '
+        'кэширующим загрузчиком. Кэш страниц очищается перед каждым '
+        'запросом, чтобы страница действительно отрисовывалась.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*', default=['/'],
+            help='Адреса для замера, по умолчанию главная.'
+        )
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"загрузчик":<12}{"view":<20}{"шаблоны, мс":>14}'
+            f'{"всего p50, мс":>16}'
+        )
+        for label, loaders in PROFILES:
+            with override_settings(TEMPLATES=with_loaders(loaders)):
+                warm()
+                for name, summary in self.measure(options).items():
+                    self.stdout.write(
+                        f'{label:<12}{name:<20}'
+                        f'{summary["mean_template_ms"]:>14.2f}'
+                        f'{summary["p50_ms"]:>16.2f}'
+                    )
+
+    def measure(self, options):
+        client = Client()
+        metrics.reset()
+        for path in options['paths']:
+            for _ in range(options['repeat']):
+                cache.clear()
+                client.get(path)
+        return metrics.summary()
@@ -0,0 +1,29 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик (REPLICA_DATABASES). '
+        'Между запусками реплики отстают, как настоящие.'
+    )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES['default']
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Команда только для локальных баз SQLite.')
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('Реплики не заданы: см. DATABASE_REPLICAS.')
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias in settings.REPLICA_DATABASES:
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: скопировано')
+        finally:
+            source.close()
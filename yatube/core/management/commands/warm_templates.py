@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.template_loading import warm
+
+
+class Command(BaseCommand):
+    help = (
+        'Компилирует все шаблоны из templates/ и сообщает об ошибках. '
+        'Воркер делает то же при старте (yatube.wsgi), если включён '
+        'кэширующий загрузчик.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count, errors = warm(force=True)
+        elapsed = (time.perf_counter() - started) * 1000
+        for name, error in errors.items():
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(f'Шаблонов с ошибками: {len(errors)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Шаблонов: {count}, {elapsed:.1f} мс'
+        ))
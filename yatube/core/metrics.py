@@ -0,0 +1,117 @@
+"""Замеры одного запроса и скользящая статистика по view.
+
+Во время запроса в потоке живёт счётчик ``Metrics``; код, который
+хочет что-то замерить (шаблоны, кэш, миниатюры), обращается к нему
+через ``timed`` и ``incr``. Вне запроса эти функции ничего не делают.
+Итоги запроса попадают в окно из последних ``REQUEST_METRICS_WINDOW``
+замеров своего view; окно живёт в памяти процесса.
+"""
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from django.conf import settings
+
+_local = threading.local()
+_lock = threading.Lock()
+_windows = defaultdict(
+    lambda: deque(maxlen=getattr(settings, 'REQUEST_METRICS_WINDOW', 1000))
+)
+
+FIELDS = (
+    'total', 'sql', 'sql_count', 'template', 'thumbnails',
+    'cache_hits', 'cache_misses',
+)
+# Поля со временем в секундах; в сводке они переводятся в миллисекунды.
+SECONDS = ('sql', 'template', 'thumbnails')
+
+
+class Metrics:
+    def __init__(self):
+        self.values = dict.fromkeys(FIELDS, 0)
+        self._depth = defaultdict(int)
+
+    def add(self, name, value):
+        self.values[name] += value
+
+
+def current():
+    return getattr(_local, 'metrics', None)
+
+
+@contextmanager
+def collect():
+    """Собирать замеры текущего потока в новый ``Metrics``."""
+    metrics = _local.metrics = Metrics()
+    try:
+        yield metrics
+    finally:
+        _local.metrics = None
+
+
+def incr(name, value=1):
+    metrics = current()
+    if metrics is not None:
+        metrics.add(name, value)
+
+
+@contextmanager
+def timed(name):
+    """Замерить время блока; вложенные замеры одного имени не удваиваются."""
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    metrics._depth[name] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics._depth[name] -= 1
+        if not metrics._depth[name]:
+            metrics.add(name, time.perf_counter() - started)
+
+
+def record(view_name, metrics):
+    with _lock:
+        _windows[view_name].append(tuple(metrics.values[f] for f in FIELDS))
+
+
+def percentile(values, fraction):
+    """Перцентиль по индексу в отсортированной выборке (0 < fraction ≤ 1).
+
+    Без statistics.quantiles: тот появился только в Python 3.8.
+    """
+    values = sorted(values)
+    return values[int(fraction * (len(values) - 1))]
+
+
+def summary():
+    """Сводка по каждому view: число запросов, перцентили, средние."""
+    with _lock:
+        windows = {name: list(samples) for name, samples in _windows.items()}
+    result = {}
+    for name, samples in sorted(windows.items()):
+        columns = dict(zip(FIELDS, zip(*samples)))
+        totals = sorted(columns['total'])
+        result[name] = {
+            'requests': len(samples),
+            'p50_ms': round(statistics.median(totals) * 1000, 2),
+            'p95_ms': round(percentile(totals, 0.95) * 1000, 2),
+            'max_ms': round(totals[-1] * 1000, 2),
+            **{
+                f'mean_{field}' + ('_ms' if field in SECONDS else ''): round(
+                    statistics.mean(columns[field])
+                    * (1000 if field in SECONDS else 1), 2
+                )
+                for field in FIELDS[1:]
+            },
+        }
+    return result
+
+
+def reset():
+    with _lock:
+        _windows.clear()
@@ -0,0 +1,83 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import db_router, metrics
+
+PINNED_UNTIL_KEY = 'db_pinned_until'
+
+
+class RequestMetricsMiddleware:
+    """Замеряет запрос: SQL, шаблоны, кэш, миниатюры и общее время.
+
+    Итоги уходят в заголовок ``Server-Timing`` (их видно во вкладке
+    Network браузера) и в скользящую статистику ``core.metrics``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with metrics.collect() as current, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(self.execute)
+                )
+            response = self.get_response(request)
+        current.values['total'] = time.perf_counter() - started
+        match = request.resolver_match
+        metrics.record(match.view_name if match else '<unresolved>', current)
+        response['Server-Timing'] = self.server_timing(current.values)
+        return response
+
+    @staticmethod
+    def execute(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            metrics.incr('sql', time.perf_counter() - started)
+            metrics.incr('sql_count')
+
+    @staticmethod
+    def server_timing(values):
+        def duration(seconds):
+            return f'{seconds * 1000:.1f}'
+
+        return ', '.join([
+            f'sql;dur={duration(values["sql"])};'
+            f'desc="{values["sql_count"]} queries"',
+            f'template;dur={duration(values["template"])}',
+            f'thumbnails;dur={duration(values["thumbnails"])}',
+            f'cache;desc="{values["cache_hits"]} hits, '
+            f'{values["cache_misses"]} misses"',
+            f'total;dur={duration(values["total"])}',
+        ])
+
+
+class ReplicaPinningMiddleware:
+    """Закрепляет сессию за основной базой на время после записи.
+
+    Изменяющие запросы и запросы в течение ``REPLICA_STICKY_SECONDS``
+    после записи читают из основной базы, остальные — с реплик.
+    Должен стоять после SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REPLICA_DATABASES:
+            return self.get_response(request)
+        pinned = request.method not in ('GET', 'HEAD', 'OPTIONS') or \
+            request.session.get(PINNED_UNTIL_KEY, 0) > time.time()
+        with db_router.pinning(pinned) as state:
+            response = self.get_response(request)
+        if state.wrote:
+            request.session[PINNED_UNTIL_KEY] = (
+                time.time() + settings.REPLICA_STICKY_SECONDS
+            )
+        return response
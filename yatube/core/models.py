@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class StoredFile(models.Model):
+    """Строка-замок файла в ContentAddressedStorage.
+
+    Загрузка и удаление одного и того же содержимого обновляют эту
+    строку в своей транзакции и поэтому идут по очереди.
+    """
+    name = models.CharField(max_length=255, primary_key=True)
+    locked_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Файл хранилища'
+        verbose_name_plural = 'Файлы хранилища'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,170 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.db.models.query import QuerySet
+
+NEXT = 'n'
+PREVIOUS = 'p'
+# Пропуск в сокращённом списке номеров страниц.
+ELLIPSIS = '…'
+
+
+def dump_cursor(direction, values):
+    """Курсор для ссылки: направление и значения ключа в base64."""
+    token = json.dumps([direction, values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+
+
+def load_cursor(cursor, size):
+    """Разобрать курсор из ``size`` значений; ValueError, если испорчен."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded))
+    except (TypeError, binascii.Error) as error:
+        raise ValueError(cursor) from error
+    if direction not in (NEXT, PREVIOUS) or not isinstance(values, list) \
+            or len(values) != size:
+        raise ValueError(cursor)
+    return direction, values
+
+
+class KeysetPaginator(Paginator):
+    """Пагинатор по ключу (по умолчанию (pub_date, id)).
+
+    Страницы выбираются условием на ключ последней показанной записи,
+    поэтому не нужны ни COUNT(*), ни OFFSET: тысячная страница стоит
+    столько же, сколько первая. Обычная постраничная навигация
+    (``get_page``) остаётся доступной для старых ссылок ``?page=``.
+    """
+
+    ELLIPSIS = ELLIPSIS
+
+    def __init__(self, object_list, per_page, keys=('-pub_date', '-id'),
+                 **kwargs):
+        self.keys = tuple(keys)
+        if isinstance(object_list, QuerySet):
+            object_list = object_list.order_by(*self.keys)
+        super().__init__(object_list, per_page, **kwargs)
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        """Номера страниц вокруг текущей и по краям, с ELLIPSIS вместо
+        пропусков: ``1 … 48 49 50 51 52 … 100``.
+
+        Как ``Paginator.get_elided_page_range`` из Django 3.2.
+        """
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+    def get_cursor_queryset(self, cursor=None):
+        """Запрос страницы по курсору: на одну запись больше страницы."""
+        direction, values = self.decode_cursor(cursor)
+        backwards = direction == PREVIOUS
+        ordering = [self._invert(key) for key in self.keys] if backwards \
+            else self.keys
+        queryset = self.object_list.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(values, backwards))
+        return queryset[:self.per_page + 1]
+
+    def get_cursor_page(self, cursor=None):
+        """Вернуть страницу, следующую за курсором (или первую)."""
+        direction, values = self.decode_cursor(cursor)
+        backwards = direction == PREVIOUS
+        rows = list(self.get_cursor_queryset(cursor))
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = values is not None, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        page = Page(rows, 1, self)
+        page.is_keyset = True
+        page.next_cursor = (
+            self.encode_cursor(NEXT, rows[-1]) if rows and has_next else None
+        )
+        page.previous_cursor = (
+            self.encode_cursor(PREVIOUS, rows[0])
+            if rows and has_previous else None
+        )
+        return page
+
+    def encode_cursor(self, direction, obj):
+        return dump_cursor(direction, [
+            self._get_field(key).value_to_string(obj) for key in self.keys
+        ])
+
+    def decode_cursor(self, cursor):
+        """Разобрать курсор; испорченный курсор ведёт на первую страницу."""
+        if not cursor:
+            return NEXT, None
+        try:
+            direction, values = load_cursor(cursor, len(self.keys))
+            values = [
+                self._get_field(key).to_python(value)
+                for key, value in zip(self.keys, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            return NEXT, None
+        # Ключи ленты не бывают пустыми: с None курсор не собрать в запрос.
+        if None in values:
+            return NEXT, None
+        return direction, values
+
+    def _get_field(self, key):
+        return self.object_list.model._meta.get_field(key.lstrip('-'))
+
+    def _after(self, values, backwards):
+        """Условие «строго после ключа» для лексикографического порядка."""
+        condition = Q()
+        for position, key in enumerate(self.keys):
+            step = Q(**{self._lookup(key, 'lt', backwards): values[position]})
+            for previous_key, value in zip(self.keys, values[:position]):
+                step &= Q(**{previous_key.lstrip('-'): value})
+            condition |= step
+        # Избыточное условие на первый ключ позволяет базе начать чтение
+        # индекса сразу с курсора, а не просматривать его с начала.
+        first = Q(**{self._lookup(self.keys[0], 'lte', backwards): values[0]})
+        return first & condition
+
+    @staticmethod
+    def _lookup(key, operator, backwards):
+        if key.startswith('-') == backwards:
+            operator = operator.replace('l', 'g')
+        return f'{key.lstrip("-")}__{operator}'
+
+    @staticmethod
+    def _invert(key):
+        return key[1:] if key.startswith('-') else f'-{key}'
+
+
+def get_page(request, object_list, per_page, keys=('-pub_date', '-id'),
+             numbered=True):
+    """Страница ленты: по курсору ``?cursor=`` или по номеру ``?page=``.
+
+    С ``numbered=False`` номер страницы не учитывается (API отдаёт
+    только страницы с курсорами).
+    """
+    paginator = KeysetPaginator(object_list, per_page, keys=keys)
+    page_number = request.GET.get('page')
+    if numbered and page_number is not None:
+        return paginator.get_page(page_number)
+    return paginator.get_cursor_page(request.GET.get('cursor'))
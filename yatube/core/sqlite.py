@@ -0,0 +1,21 @@
+"""Настройка новых соединений SQLite.
+
+Каждому соединению с базой на SQLite выставляются PRAGMA из
+``SQLITE_PRAGMAS``: они действуют на соединение, а не на файл базы
+(кроме ``journal_mode=WAL``, который запоминается в самом файле).
+В режиме WAL читатели работают со снимком базы и не ждут писателя,
+а писатель не ждёт читателей.
+"""
+from django.conf import settings
+
+
+def apply_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+
+
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
@@ -0,0 +1,125 @@
+"""Стеммер Snowball для русского языка.
+
+Повторяет алгоритм https://snowballstem.org/algorithms/russian/stemmer.html
+без внешних зависимостей: FTS5 не умеет склонять русские слова, поэтому
+и текст при индексации, и запрос приводятся к основам здесь.
+"""
+import re
+
+VOWELS = 'аеиоуыэюя'
+WORD = re.compile(r'\w+')
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = ((), (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+))
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = ((), (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и',
+    'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о',
+    'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я',
+))
+DERIVATIONAL = ('ост', 'ость')
+SUPERLATIVE = ('ейше', 'ейш')
+
+
+def _regions(word):
+    """Начала областей RV и R2."""
+    rv = len(word)
+    for index, letter in enumerate(word):
+        if letter in VOWELS:
+            rv = index + 1
+            break
+    # R1 начинается после первой согласной, следующей за гласной,
+    # R2 — по тому же правилу внутри R1.
+    start = 0
+    for _ in range(2):
+        for index in range(start + 1, len(word)):
+            if word[index] not in VOWELS and word[index - 1] in VOWELS:
+                start = index + 1
+                break
+        else:
+            return rv, len(word)
+    r2 = start
+    return rv, r2
+
+
+def _remove(word, rv, groups):
+    """Отрезать самое длинное окончание из групп, лежащее в RV.
+
+    Окончания первой группы отрезаются, только если перед ними
+    стоит «а» или «я» (сама буква остаётся).
+    """
+    conditional, plain = groups
+    found = None
+    for ending in (*conditional, *plain):
+        if word.endswith(ending) and len(word) - len(ending) >= rv and (
+            found is None or len(ending) > len(found)
+        ):
+            found = ending
+    if found is None:
+        return None
+    stem = word[:-len(found)]
+    if found in conditional and found not in plain:
+        if len(stem) <= rv or stem[-1] not in 'ая':
+            return None
+    return stem
+
+
+def _step1(word, rv):
+    """Деепричастие, иначе возвратность и одно из окончаний
+    прилагательного (с причастием), глагола или существительного.
+    """
+    stemmed = _remove(word, rv, PERFECTIVE_GERUND)
+    if stemmed is not None:
+        return stemmed
+    word = _remove(word, rv, REFLEXIVE) or word
+    stemmed = _remove(word, rv, ADJECTIVE)
+    if stemmed is not None:
+        return _remove(stemmed, rv, PARTICIPLE) or stemmed
+    return _remove(word, rv, VERB) or _remove(word, rv, NOUN) or word
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    word = _step1(word, rv)
+    # Шаг 2.
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    # Шаг 3: словообразовательное окончание целиком в R2.
+    for ending in DERIVATIONAL[::-1]:
+        if word.endswith(ending) and len(word) - len(ending) >= max(rv, r2):
+            word = word[:-len(ending)]
+            break
+    # Шаг 4: превосходная степень, двойное «н», мягкий знак.
+    for ending in SUPERLATIVE:
+        if word.endswith(ending) and len(word) - len(ending) >= rv:
+            word = word[:-len(ending)]
+            break
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        word = word[:-1]
+    elif word.endswith('ь') and len(word) - 1 >= rv:
+        word = word[:-1]
+    return word
+
+
+def stem_words(text):
+    """Основы всех слов текста в исходном порядке."""
+    return [stem(word) for word in WORD.findall(text)]
@@ -0,0 +1,81 @@
+"""Хранилище файлов по хэшу содержимого.
+
+Файл сохраняется под именем ``<каталог>/<ab>/<sha256><расширение>``:
+одинаковые загрузки превращаются в один файл, а содержимое по адресу
+никогда не меняется, поэтому его можно кэшировать навсегда. Удалять
+файл можно только когда на него не ссылается ни одна запись — это
+решает код приложения (``posts.thumbnails.release``).
+
+Повторная загрузка получает имя уже лежащего файла, а ссылку на него
+запишет только позже, при сохранении записи. Чтобы удаление не
+проскочило между этими шагами, ``save`` и удаление берут ``lock`` на
+имя файла: блокировка держится до конца транзакции, поэтому запись,
+ссылающуюся на файл, нужно сохранять в той же транзакции.
+"""
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+from .models import StoredFile
+
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+def is_hashed_name(name):
+    """Имя выдано ContentAddressedStorage, и содержимое по нему неизменно."""
+    return bool(HASHED_NAME.search(name))
+
+
+def lock(name):
+    """Заблокировать имя файла до конца текущей транзакции.
+
+    Блокировка — запись в строку StoredFile: SQLite пускает только
+    одного писателя, другие базы блокируют строку.
+    """
+    while not StoredFile.objects.filter(name=name).update(
+        locked_at=timezone.now()
+    ):
+        StoredFile.objects.get_or_create(
+            name=name, defaults={'locked_at': timezone.now()}
+        )
+
+
+def unlock(name):
+    """Забыть имя удалённого файла; вызывать под ``lock``."""
+    StoredFile.objects.filter(name=name).delete()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = os.path.split(name)
+        if is_hashed_name(name):
+            # Пересохранение файла хранилища: каталог <ab>/ не копим.
+            directory = os.path.dirname(directory)
+        extension = os.path.splitext(filename)[1].lower()
+        value = digest.hexdigest()
+        return os.path.join(directory, value[:2], value + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        with transaction.atomic():
+            lock(name)
+            # Такой файл уже есть: повторная загрузка не занимает места.
+            if self.exists(name):
+                return name
+            return self._save(name, content)
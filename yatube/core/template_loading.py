@@ -0,0 +1,53 @@
+"""Прогрев кэширующего загрузчика шаблонов.
+
+С ``django.template.loaders.cached.Loader`` шаблон разбирается при
+первом обращении и дальше живёт в памяти процесса. ``warm`` делает
+это заранее для всех шаблонов из каталогов ``DIRS`` (``templates/``),
+чтобы первые запросы воркера не платили за чтение и разбор.
+"""
+import os
+
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+
+
+def uses_cache(engine):
+    return any(
+        isinstance(loader, CachedLoader) for loader in engine.template_loaders
+    )
+
+
+def template_names(engine):
+    """Имена всех файлов в каталогах ``DIRS`` движка."""
+    names = set()
+    for directory in engine.dirs:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                names.add(os.path.relpath(path, directory).replace(
+                    os.sep, '/'
+                ))
+    return sorted(names)
+
+
+def warm(force=False):
+    """Скомпилировать шаблоны всех движков Django.
+
+    Без кэширующего загрузчика прогрев бесполезен и пропускается, если
+    не передан ``force`` (так команда warm_templates проверяет, что все
+    шаблоны разбираются). Возвращает (число шаблонов, {имя: ошибка}).
+    """
+    count, errors = 0, {}
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        if not force and not uses_cache(backend.engine):
+            continue
+        for name in template_names(backend.engine):
+            try:
+                backend.engine.get_template(name)
+            except Exception as error:
+                errors[name] = error
+            count += 1
+    return count, errors
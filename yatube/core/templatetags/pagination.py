@@ -0,0 +1,14 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag
+def elided_page_range(page_obj, on_each_side=2, on_ends=1):
+    """Номера страниц для навигации: соседи текущей и края списка.
+
+    На ленте из тысяч страниц выводится десяток ссылок, а не тысячи.
+    """
+    return list(page_obj.paginator.get_elided_page_range(
+        page_obj.number, on_each_side=on_each_side, on_ends=on_ends
+    ))
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import threading
+
+from django.test import SimpleTestCase
+
+from core.cache_backends.sqlite import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, 'cache.sqlite3')
+        self.cache = SQLiteCache(
+            self.location, {'OPTIONS': {'MAX_ENTRIES': 4, 'CULL_EVERY': 1}}
+        )
+
+    def test_set_get_add(self):
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertFalse(self.cache.add('key', 'другое'))
+        self.assertTrue(self.cache.add('new', 'значение'))
+        self.assertIsNone(self.cache.get('missing'))
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_shared_between_instances(self):
+        """Другой процесс (экземпляр) видит те же записи."""
+        self.cache.set('key', 'value')
+        other = SQLiteCache(self.location, {})
+        self.assertEqual(other.get('key'), 'value')
+        with self.assertRaises(ValueError):
+            other.incr('missing')
+        other.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter'), 2)
+        self.assertEqual(other.get('counter'), 2)
+
+    def test_stats_count_all_threads(self):
+        """Счётчики общие для экземпляров кэша в разных потоках."""
+        self.cache.set('key', 'value')
+
+        def read():
+            other = SQLiteCache(self.location, {})
+            other.get('key')
+            other.get('missing')
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+        self.cache.get('key')
+        self.assertEqual(self.cache.stats()['hits'], 2)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_expired_entry_is_missing(self):
+        self.cache.set('key', 'value', timeout=0)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'value'))
+
+    def test_lru_eviction(self):
+        """При переполнении вытесняются давно не читанные записи."""
+        for number in range(4):
+            self.cache.set(f'key{number}', number)
+        self.cache._db.execute(
+            "UPDATE cache SET accessed = 0 WHERE key LIKE '%key0'"
+        )
+        self.cache.set('key4', 4)
+        self.assertIsNone(self.cache.get('key0'))
+        self.assertEqual(self.cache.get('key4'), 4)
+        self.assertLessEqual(self.cache.stats()['entries'], 4)
+
+    def test_size_checked_every_n_writes(self):
+        """Размер кэша проверяется раз в CULL_EVERY записей."""
+        cache = SQLiteCache(
+            self.location, {'OPTIONS': {'MAX_ENTRIES': 2, 'CULL_EVERY': 5}}
+        )
+        for number in range(4):
+            cache.set(f'key{number}', number)
+        self.assertEqual(cache.stats()['entries'], 4)
+        cache.set('key4', 4)
+        self.assertLess(cache.stats()['entries'], 5)
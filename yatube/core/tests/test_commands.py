@@ -0,0 +1,21 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+
+class BenchmarkConcurrencyTests(SimpleTestCase):
+    def test_reports_latency_tails(self):
+        out = StringIO()
+        call_command(
+            'benchmark_concurrency', '/about/tech/', clients=2, requests=2,
+            app='yatube.wsgi.application', stdout=out,
+        )
+        self.assertIn('запросов: 4, ошибок: 0', out.getvalue())
+        self.assertIn('p99', out.getvalue())
+
+    def test_address_must_have_port(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                'benchmark_concurrency', address='localhost', stdout=StringIO()
+            )
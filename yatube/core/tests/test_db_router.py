@@ -0,0 +1,73 @@
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import db_router
+from core.middleware import PINNED_UNTIL_KEY, ReplicaPinningMiddleware
+from posts.caching import INDEX, cache_page_by_generation
+from posts.models import Post
+
+REPLICAS = ['replica1', 'replica2']
+
+
+@override_settings(REPLICA_DATABASES=REPLICAS)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = db_router.ReplicaRouter()
+
+    def test_reads_go_to_replicas_and_writes_to_primary(self):
+        self.assertIn(self.router.db_for_read(Post), REPLICAS)
+        self.assertEqual(self.router.db_for_write(Post), DEFAULT_DB_ALIAS)
+        self.assertEqual(self.router.db_for_read(Session), DEFAULT_DB_ALIAS)
+
+    def test_reads_after_write_stay_on_primary(self):
+        with db_router.pinning() as state:
+            self.assertIn(self.router.db_for_read(Post), REPLICAS)
+            self.router.db_for_write(Post)
+            self.assertTrue(state.wrote)
+            self.assertEqual(self.router.db_for_read(Post), DEFAULT_DB_ALIAS)
+
+    def test_migrations_only_on_primary(self):
+        self.assertTrue(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+
+    def test_session_sticks_after_write(self):
+        reads = []
+
+        def view(request):
+            reads.append(self.router.db_for_read(Post))
+            if request.method == 'POST':
+                self.router.db_for_write(Post)
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(view)
+        factory = RequestFactory()
+        session = {}
+        for method in ('get', 'post', 'get'):
+            request = getattr(factory, method)('/')
+            request.session = session
+            middleware(request)
+        self.assertIn(reads[0], REPLICAS)
+        self.assertEqual(reads[1:], [DEFAULT_DB_ALIAS, DEFAULT_DB_ALIAS])
+        self.assertIn(PINNED_UNTIL_KEY, session)
+
+    def test_cached_pages_are_built_from_primary(self):
+        """Страница, которая попадёт в кэш, читается из основной базы."""
+        reads = []
+
+        @cache_page_by_generation(INDEX, timeout=60)
+        def view(request):
+            reads.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        request = RequestFactory().get('/primary-read/')
+        request.user = AnonymousUser()
+        cache.clear()
+        with db_router.pinning() as state:
+            view(request)
+            self.assertFalse(state.pinned)
+            self.assertIn(self.router.db_for_read(Post), REPLICAS)
+        self.assertEqual(reads, [DEFAULT_DB_ALIAS])
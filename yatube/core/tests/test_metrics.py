@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import metrics
+
+User = get_user_model()
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('posts:main'))
+        timing = response['Server-Timing']
+        for name in ('sql;dur=', 'template;dur=', 'cache;desc=', 'total;'):
+            self.assertIn(name, timing)
+
+    def test_cached_page_skips_templates(self):
+        """Второй запрос отдаётся из кэша: без шаблонов, с попаданием."""
+        self.client.get(reverse('posts:main'))
+        response = self.client.get(reverse('posts:main'))
+        self.assertIn('template;dur=0.0', response['Server-Timing'])
+        self.assertNotIn('desc="0 hits', response['Server-Timing'])
+
+    def test_percentile_by_index(self):
+        """Перцентиль без statistics.quantiles (его нет в Python 3.7)."""
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual(metrics.percentile(values, 0.5), 3)
+        self.assertEqual(metrics.percentile(values, 0.99), 4)
+        self.assertEqual(metrics.percentile(values, 1), 5)
+        self.assertEqual(metrics.percentile([7], 0.95), 7)
+
+    def test_summary_is_staff_only(self):
+        self.client.get(reverse('posts:main'))
+        url = reverse('request_metrics')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        staff = Client()
+        staff.force_login(
+            User.objects.create(username='staff', is_staff=True)
+        )
+        summary = staff.get(url).json()
+        self.assertEqual(summary['posts:main']['requests'], 1)
+        self.assertIn('mean_sql_count', summary['posts:main'])
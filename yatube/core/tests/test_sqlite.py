@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from core.sqlite import configure_connection
+
+
+class SQLitePragmaTests(TestCase):
+    def test_connection_tuned(self):
+        """Соединение Django получает PRAGMA из настроек."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout']
+            )
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -4096})
+    def test_pragmas_applied_to_connection(self):
+        """PRAGMA из настроек выставляются соединению."""
+        configure_connection(sender=None, connection=connection)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -4096)
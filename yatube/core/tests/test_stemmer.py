@@ -0,0 +1,23 @@
+from django.test import SimpleTestCase
+
+from core.stemmer import stem, stem_words
+
+
+class StemmerTests(SimpleTestCase):
+    def test_snowball_examples(self):
+        examples = {
+            'важная': 'важн',
+            'вагоны': 'вагон',
+            'бегают': 'бега',
+            'красивейший': 'красив',
+            'программирование': 'программирован',
+            'ёлки': 'елк',
+        }
+        for word, expected in examples.items():
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+    def test_word_forms_share_stem(self):
+        self.assertEqual(
+            set(stem_words('Подписка, подписки, ПОДПИСКУ')), {'подписк'}
+        )
@@ -0,0 +1,110 @@
+import importlib
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from core.models import StoredFile
+from core.storage import is_hashed_name
+from posts import thumbnails
+from posts import urls as posts_urls
+from posts.models import Post
+from yatube import urls
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+
+    def create(self, filename):
+        return Post.objects.create(
+            author=self.author,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(filename, SMALL_GIF, 'image/gif'),
+        )
+
+    def test_duplicate_upload_is_stored_once(self):
+        """Одинаковые картинки под разными именами — один файл."""
+        first, second = self.create('one.gif'), self.create('two.GIF')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith('posts/'))
+        self.assertTrue(is_hashed_name(first.image.name))
+
+    def test_file_released_with_last_reference(self):
+        """Файл удаляется, только когда на него не ссылается ни один пост."""
+        first, second = self.create('one.gif'), self.create('two.gif')
+        name = first.image.name
+        storage = first.image.storage
+        first.delete()
+        thumbnails.release(name)
+        self.assertTrue(storage.exists(name))
+        second.delete()
+        thumbnails.release(name)
+        self.assertFalse(storage.exists(name))
+
+    def test_reupload_before_release_keeps_file(self):
+        """Та же картинка загружена заново до освобождения старой ссылки:
+        файл остаётся за новым постом."""
+        first = self.create('one.gif')
+        name = first.image.name
+        first.delete()
+        second = self.create('two.gif')
+        self.assertEqual(second.image.name, name)
+        thumbnails.release(name)
+        self.assertTrue(second.image.storage.exists(name))
+        self.assertTrue(StoredFile.objects.filter(name=name).exists())
+
+    def test_reupload_after_release_restores_file(self):
+        """После освобождения повторная загрузка записывает файл заново."""
+        first = self.create('one.gif')
+        name = first.image.name
+        first.delete()
+        thumbnails.release(name)
+        self.assertFalse(first.image.storage.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+        second = self.create('two.gif')
+        self.assertEqual(second.image.name, name)
+        with second.image.open() as file:
+            self.assertEqual(file.read(), SMALL_GIF)
+
+    def test_hashed_media_cached_forever(self):
+        """Файлы по хэшу отдаются с вечным кэшем, остальные — без него."""
+        name = self.create('one.gif').image.name
+        with open(f'{TEMP_MEDIA_ROOT}/other.gif', 'wb') as file:
+            file.write(SMALL_GIF)
+        # MEDIA подключается к адресам только при DEBUG: собираем адреса
+        # заново, как при запуске runserver.
+        with override_settings(DEBUG=True):
+            importlib.reload(posts_urls)
+            debug_urls = importlib.reload(urls)
+        self.addCleanup(importlib.reload, urls)
+        self.addCleanup(importlib.reload, posts_urls)
+        with override_settings(ROOT_URLCONF=debug_urls):
+            response = self.client.get(settings.MEDIA_URL + name)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertIn('max-age=31536000', response['Cache-Control'])
+            response = self.client.get(settings.MEDIA_URL + 'other.gif')
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.has_header('Cache-Control'))
@@ -0,0 +1,29 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from core.management.commands.benchmark_templates import PROFILES, with_loaders
+from core.template_loading import warm
+
+
+class TemplateWarmupTests(SimpleTestCase):
+    def test_skipped_without_cached_loader(self):
+        """Без кэширующего загрузчика прогревать нечего."""
+        with override_settings(TEMPLATES=with_loaders(PROFILES[0][1])):
+            self.assertEqual(warm(), (0, {}))
+
+    def test_warm_fills_template_cache(self):
+        """Все шаблоны templates/ разбираются и ложатся в кэш загрузчика."""
+        with override_settings(TEMPLATES=with_loaders(PROFILES[1][1])):
+            count, errors = warm()
+            self.assertEqual(errors, {})
+            loader = engines.all()[0].engine.template_loaders[0]
+            self.assertIn('posts/index.html', loader.get_template_cache)
+            self.assertEqual(len(loader.get_template_cache), count)
+
+    def test_warm_templates_command(self):
+        out = StringIO()
+        call_command('warm_templates', stdout=out)
+        self.assertIn('Шаблонов:', out.getvalue())
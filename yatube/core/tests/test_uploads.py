@@ -0,0 +1,99 @@
+import io
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def png(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height)).save(buffer, 'PNG')
+    return SimpleUploadedFile('image.png', buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client.force_login(User.objects.create(username='author'))
+
+    def create(self, image):
+        return self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с картинкой', 'image': image},
+        )
+
+    @override_settings(MAX_UPLOAD_SIZE=100)
+    def test_large_file_is_cut_off(self):
+        response = self.create(png(200, 200))
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 100\xa0байт.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(MAX_IMAGE_PIXELS=100)
+    def test_pixel_limit_checked_from_header(self):
+        response = self.create(png(20, 20))
+        errors = response.context['form'].errors['image']
+        self.assertIn('мегапикселей', errors[0])
+        self.assertFalse(Post.objects.exists())
+
+    def test_image_within_limits(self):
+        self.create(png(20, 20))
+        self.assertTrue(
+            Post.objects.filter(image__startswith='posts/').exists()
+        )
+
+    def test_uploaded_file_readable_by_web_server(self):
+        """Загрузка из временного файла не остаётся с правами 0600."""
+        self.create(png(20, 20))
+        path = Post.objects.get().image.path
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+        self.assertEqual(
+            os.stat(os.path.dirname(path)).st_mode & 0o777, 0o755
+        )
+
+    @override_settings(THUMBNAIL_WORKERS=1)
+    def test_upload_does_not_wait_for_processing(self):
+        """Очистка метаданных и миниатюры идут в пуле: ответ на загрузку
+        приходит, пока обработка картинки ещё не закончилась."""
+        started, release = threading.Event(), threading.Event()
+        finished = threading.Event()
+        threads = []
+
+        def generate(post_id, name):
+            threads.append(threading.current_thread().name)
+            started.set()
+            release.wait(5)
+            finished.set()
+
+        # В TestCase транзакция не фиксируется: запускаем on_commit сразу.
+        commit = mock.patch.object(
+            thumbnails.transaction, 'on_commit', lambda func: func()
+        )
+        with commit, mock.patch.object(thumbnails, '_generate', generate):
+            response = self.create(png(20, 20))
+            self.assertTrue(started.wait(5))
+            self.assertFalse(finished.is_set())
+            release.set()
+            self.assertTrue(finished.wait(5))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(threads[0].startswith('thumbnails'))
@@ -0,0 +1,76 @@
+"""Загрузка картинок без лишней работы в потоке запроса.
+
+Файлы пишутся на диск по частям (TemporaryFileUploadHandler), а
+``SizeLimitUploadHandler`` перестаёт принимать данные, как только
+файл превысил ``MAX_UPLOAD_SIZE``. ``validate_image`` проверяет
+размеры картинки по заголовку, до того как Pillow начнёт её разбирать.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+
+
+class RejectedUpload(SimpleUploadedFile):
+    """Пустая замена файла, который оказался больше допустимого."""
+
+    too_large = True
+
+    def __init__(self, name, content_type):
+        super().__init__(name, b'', content_type)
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    """Обрывает приём файла, превысившего ``MAX_UPLOAD_SIZE``.
+
+    Стоит перед обработчиком, который пишет файл: лишние части до него
+    не доходят, а форма получает ``RejectedUpload`` и показывает ошибку.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.rejected = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.MAX_UPLOAD_SIZE:
+            self.rejected = True
+        return None if self.rejected else raw_data
+
+    def file_complete(self, file_size):
+        if self.rejected:
+            return RejectedUpload(self.file_name, self.content_type)
+        return None
+
+
+def too_large_error():
+    return ValidationError(
+        'Файл больше %(limit)s.', code='too_large',
+        params={'limit': filesizeformat(settings.MAX_UPLOAD_SIZE)},
+    )
+
+
+def validate_image(value):
+    """Валидатор ImageField: размер файла и число пикселей.
+
+    Размеры берутся из заголовка, который уже прочитал ImageField:
+    пиксели при этом не распаковываются.
+    """
+    if value.size > settings.MAX_UPLOAD_SIZE:
+        raise too_large_error()
+    image = getattr(value, 'image', None)
+    if image is None:
+        return
+    width, height = image.size
+    if width * height > settings.MAX_IMAGE_PIXELS:
+        raise ValidationError(
+            'Картинка %(width)s×%(height)s слишком большая: '
+            'допустимо не больше %(limit)s мегапикселей.',
+            code='too_many_pixels',
+            params={
+                'width': width, 'height': height,
+                'limit': settings.MAX_IMAGE_PIXELS // 10 ** 6,
+            },
+        )
@@ -1,5 +1,17 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from django.views import static
 from http import HTTPStatus
+from sorl.thumbnail.conf import settings as sorl_settings
+
+from . import metrics
+from .storage import is_hashed_name
+
+# Адреса, содержимое по которым никогда не меняется: оригиналы в
+# хранилище по хэшу и миниатюры sorl (их имя — хэш источника и опций).
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
 
 
 def page_not_found(request, exception):
@@ -21,3 +33,23 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@staff_member_required
+def request_metrics(request):
+    """Скользящая статистика запросов по view текущего процесса."""
+    return JsonResponse(
+        metrics.summary(), json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def serve_media(request, path, document_root=None):
+    """Раздача MEDIA в разработке с вечным кэшем для неизменных файлов."""
+    response = static.serve(request, path, document_root=document_root)
+    if response.status_code == HTTPStatus.OK and (
+        is_hashed_name(path) or path.startswith(sorl_settings.THUMBNAIL_PREFIX)
+    ):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    return response
@@ -1,5 +1,9 @@
 from django.contrib import admin
+from django.db import models
 
+from core.uploads import validate_image
+
+from . import search
 from .models import Post, Group, Comment, Follow
 
 
@@ -9,6 +13,17 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    formfield_overrides = {
+        models.ImageField: {'validators': [validate_image]},
+    }
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по индексу FTS5; search_fields — запасной вариант без него.
+        if search_term:
+            found = search.filter_posts(queryset, search_term)
+            if found is not None:
+                return found, False
+        return super().get_search_results(request, queryset, search_term)
 
 
 admin.site.register(Post, PostAdmin)
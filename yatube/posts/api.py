@@ -0,0 +1,206 @@
+"""JSON API только для чтения и NDJSON-выгрузка истории.
+
+Списки отдаются страницами с курсорами ``next``/``previous`` (как в
+ленте), поля можно ограничить параметром ``?fields=id,text``.
+Выгрузка ``/export/...ndjson`` идёт потоком по серверному курсору
+и не держит в памяти больше одной пачки постов.
+"""
+import json
+from functools import wraps
+from http import HTTPStatus
+
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+
+from core.paginator import KeysetPaginator
+from .caching import INDEX, POST, cache_page_by_generation
+from .feeds import get_feed_page
+from .models import Comment, Group, Post, User
+
+PER_PAGE = 20
+MAX_PER_PAGE = 100
+EXPORT_CHUNK = 500
+CACHE_TIMEOUT = 60 * 60 * 6
+
+POST_FIELDS = {
+    'id': lambda post: post.pk,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: post.pub_date.isoformat(),
+    'author': lambda post: post.author.username,
+    'group': lambda post: post.group.slug if post.group else None,
+    'image': lambda post: post.image.url if post.image else None,
+}
+GROUP_FIELDS = {
+    'id': lambda group: group.pk,
+    'title': lambda group: group.title,
+    'slug': lambda group: group.slug,
+    'description': lambda group: group.description,
+}
+COMMENT_FIELDS = {
+    'id': lambda comment: comment.pk,
+    'post': lambda comment: comment.post_id,
+    'author': lambda comment: comment.author.username,
+    'text': lambda comment: comment.text,
+    'created': lambda comment: comment.created.isoformat(),
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def error(detail, status):
+    return JsonResponse(
+        {'detail': detail}, status=status,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def api_view(view):
+    """GET-only view, ошибки которого тоже отдаются в JSON."""
+    @require_GET
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return error('Не найдено.', HTTPStatus.NOT_FOUND)
+        except BadRequest as exception:
+            return error(str(exception), HTTPStatus.BAD_REQUEST)
+    return wrapper
+
+
+def get_serializer(request, fields):
+    """Функция объект -> dict с полями из ``?fields=`` (по умолчанию все)."""
+    names = request.GET.get('fields')
+    names = names.split(',') if names else list(fields)
+    unknown = set(names) - set(fields)
+    if unknown:
+        raise BadRequest(
+            f'Неизвестные поля: {", ".join(sorted(unknown))}. '
+            f'Доступны: {", ".join(fields)}.'
+        )
+    return lambda obj: {name: fields[name](obj) for name in names}
+
+
+def get_per_page(request):
+    try:
+        per_page = int(request.GET.get('limit', PER_PAGE))
+    except ValueError:
+        raise BadRequest('limit должен быть числом.')
+    return max(1, min(per_page, MAX_PER_PAGE))
+
+
+def page_response(request, page, serialize):
+    def link(cursor):
+        if cursor is None:
+            return None
+        query = request.GET.copy()
+        query.pop('page', None)
+        query['cursor'] = cursor
+        # Относительная ссылка: ответ кэшируется без учёта хоста.
+        return f'{request.path}?{query.urlencode()}'
+
+    return JsonResponse(
+        {
+            'results': [serialize(obj) for obj in page],
+            'next': link(page.next_cursor),
+            'previous': link(page.previous_cursor),
+        },
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def keyset_response(request, queryset, fields, keys=('-pub_date', '-id')):
+    serialize = get_serializer(request, fields)
+    paginator = KeysetPaginator(queryset, get_per_page(request), keys=keys)
+    page = paginator.get_cursor_page(request.GET.get('cursor'))
+    return page_response(request, page, serialize)
+
+
+@api_view
+@cache_page_by_generation(INDEX, timeout=CACHE_TIMEOUT)
+def posts(request):
+    """Посты, новые первыми; фильтры ``?group=<slug>``, ``?author=<ник>``."""
+    queryset = Post.objects.for_feed()
+    if 'group' in request.GET:
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    if 'author' in request.GET:
+        queryset = queryset.filter(author__username=request.GET['author'])
+    return keyset_response(request, queryset, POST_FIELDS)
+
+
+@api_view
+@cache_page_by_generation(POST, timeout=CACHE_TIMEOUT)
+def post_detail(request, post_id):
+    post = get_object_or_404(Post.objects.for_feed(), pk=post_id)
+    return JsonResponse(
+        get_serializer(request, POST_FIELDS)(post),
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+@api_view
+@cache_page_by_generation(POST, timeout=CACHE_TIMEOUT)
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = Comment.objects.filter(
+        post_id=post_id
+    ).select_related('author')
+    return keyset_response(
+        request, comments, COMMENT_FIELDS, keys=('created', 'id')
+    )
+
+
+@api_view
+def groups(request):
+    return keyset_response(
+        request, Group.objects.all(), GROUP_FIELDS, keys=('title', 'id')
+    )
+
+
+@api_view
+def follow(request):
+    """Лента подписок текущего пользователя."""
+    if not request.user.is_authenticated:
+        return error('Нужна авторизация.', HTTPStatus.UNAUTHORIZED)
+    serialize = get_serializer(request, POST_FIELDS)
+    # ?page= здесь не поддерживается: только курсоры, как в других списках.
+    page = get_feed_page(request, get_per_page(request), numbered=False)
+    return page_response(request, page, serialize)
+
+
+def stream(queryset, serialize):
+    for obj in queryset.iterator(chunk_size=EXPORT_CHUNK):
+        yield json.dumps(serialize(obj), ensure_ascii=False) + '\n'
+
+
+def export_response(request, queryset, filename):
+    serialize = get_serializer(request, POST_FIELDS)
+    response = StreamingHttpResponse(
+        stream(queryset.order_by('pub_date', 'id'), serialize),
+        content_type='application/x-ndjson; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@api_view
+def export_author(request, username):
+    """Вся история автора, от старых постов к новым, по строке на пост."""
+    author = get_object_or_404(User, username=username)
+    return export_response(
+        request, Post.objects.for_feed().filter(author=author),
+        f'author-{author.pk}.ndjson',
+    )
+
+
+@api_view
+def export_group(request, slug):
+    """Вся история группы, от старых постов к новым, по строке на пост."""
+    group = get_object_or_404(Group, slug=slug)
+    return export_response(
+        request, Post.objects.for_feed().filter(group=group),
+        f'group-{group.slug}.ndjson',
+    )
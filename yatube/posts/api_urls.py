@@ -0,0 +1,27 @@
+from django.urls import path
+
+from . import api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', api.posts, name='posts'),
+    path('posts/<int:post_id>/', api.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/comments/',
+        api.post_comments,
+        name='post_comments'
+    ),
+    path('groups/', api.groups, name='groups'),
+    path('follow/', api.follow, name='follow'),
+    path(
+        'export/author/<str:username>.ndjson',
+        api.export_author,
+        name='export_author'
+    ),
+    path(
+        'export/group/<slug:slug>.ndjson',
+        api.export_group,
+        name='export_group'
+    ),
+]
@@ -0,0 +1,223 @@
+"""Кэш страниц с поколениями вместо фиксированного TTL.
+
+Каждая страница относится к одной или нескольким областям (главная,
+группа, профиль, пост). У области есть номер поколения; он входит
+в ключ кэша и увеличивается сигналами при изменении постов,
+комментариев и подписок. Устаревшие страницы просто перестают
+находиться и вытесняются кэшем, поэтому TTL может быть большим.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from core import db_router
+from .models import Group, Post, User
+
+INDEX = 'index'
+GROUP = 'group:{slug}'
+PROFILE = 'profile:{username}'
+POST = 'post:{post_id}'
+
+GENERATION_KEY = 'pages:generation:{}'
+MODIFIED_KEY = 'pages:modified:{}'
+PAGE_KEY = 'pages:page:{}'
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 0.05
+LOCK_ATTEMPTS = 40
+
+
+def _new_generation():
+    # Поколение начинается с текущего времени, а не с единицы: если
+    # счётчик вытеснят из кэша, старые страницы не оживут.
+    return int(time.time() * 1000)
+
+
+def _scope_hash(scope):
+    # В слаге и имени пользователя бывают символы, недопустимые в ключах.
+    return hashlib.md5(scope.encode()).hexdigest()
+
+
+def get_versions(scopes):
+    """Поколения областей и время последнего изменения любой из них.
+
+    Время неизвестно (None), если его запись успели вытеснить из кэша.
+    """
+    hashes = [_scope_hash(scope) for scope in scopes]
+    generation_keys = [GENERATION_KEY.format(value) for value in hashes]
+    modified_keys = [MODIFIED_KEY.format(value) for value in hashes]
+    found = cache.get_many(generation_keys + modified_keys)
+    for key, modified_key in zip(generation_keys, modified_keys):
+        if key not in found:
+            cache.add(modified_key, time.time(), None)
+            cache.add(key, _new_generation(), None)
+            found[key] = cache.get(key)
+            found[modified_key] = cache.get(modified_key)
+    modified = [found.get(key) for key in modified_keys]
+    return (
+        [found[key] for key in generation_keys],
+        max(modified) if modified and None not in modified else None,
+    )
+
+
+def bump(*scopes):
+    """Сбросить кэш страниц указанных областей."""
+    now = time.time()
+    for scope in scopes:
+        key = GENERATION_KEY.format(_scope_hash(scope))
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_generation(), None)
+    cache.set_many(
+        {MODIFIED_KEY.format(_scope_hash(scope)): now for scope in scopes},
+        None,
+    )
+
+
+def _page_hash(request, generations):
+    source = '|'.join([
+        request.get_full_path(),
+        str(request.user.pk or 0),
+        *map(str, generations),
+    ])
+    return hashlib.md5(source.encode()).hexdigest()
+
+
+def _get_scopes(scopes, kwargs):
+    """Шаблоны областей заполняются аргументами view, функции вызываются."""
+    result = []
+    for scope in scopes:
+        if callable(scope):
+            result.extend(scope(**kwargs))
+        else:
+            result.append(scope.format(**kwargs))
+    return result
+
+
+def _set_validators(request, response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # Браузер хранит страницу, но каждый раз сверяет её с сервером.
+    patch_cache_control(
+        response, no_cache=True, private=request.user.is_authenticated
+    )
+    return response
+
+
+def _generation_view(scopes, timeout):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            generations, last_modified = get_versions(
+                _get_scopes(scopes, kwargs)
+            )
+            page_hash = _page_hash(request, generations)
+            etag = f'"{page_hash}"'
+            # Ответ 304 не требует ни кэша страниц, ни шаблонов.
+            response = get_conditional_response(
+                request, etag=etag,
+                last_modified=last_modified and int(last_modified),
+            )
+            if response is None:
+                response = _cached_response(
+                    PAGE_KEY.format(page_hash), timeout, view,
+                    request, *args, **kwargs
+                )
+            if response.status_code in (200, 304):
+                _set_validators(request, response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+def _cached_response(key, timeout, view, request, *args, **kwargs):
+    if timeout is None:
+        return view(request, *args, **kwargs)
+    response = cache.get(key)
+    if response is not None:
+        return response
+    lock_key = f'{key}:lock'
+    locked = cache.add(lock_key, True, LOCK_TIMEOUT)
+    if not locked:
+        for _ in range(LOCK_ATTEMPTS):
+            time.sleep(LOCK_WAIT)
+            response = cache.get(key)
+            if response is not None:
+                return response
+    try:
+        # Реплика могла ещё не получить изменение, из-за которого
+        # сменилось поколение: страницу для кэша строим по основной базе.
+        with db_router.primary():
+            response = view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            cache.set(key, response, timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return response
+
+
+def cache_page_by_generation(*scopes, timeout):
+    """Аналог ``cache_page``, который сбрасывается поколениями областей.
+
+    Области задаются шаблонами, которые заполняются аргументами view:
+    ``@cache_page_by_generation(GROUP, timeout=...)``, или функциями
+    от аргументов view, возвращающими список областей. Одновременные
+    промахи по одному ключу схлопываются: страницу строит тот, кто взял
+    блокировку, остальные ждут готовую версию. Заодно view отвечает
+    на условные запросы, как ``condition_by_generation``.
+    """
+    return _generation_view(scopes, timeout)
+
+
+def condition_by_generation(*scopes):
+    """Условный GET без кэширования самой страницы.
+
+    ETag строится из адреса, пользователя и поколений областей,
+    Last-Modified — из времени их последнего сброса. Повторный визит
+    без изменений получает 304 и не отрисовывает шаблон.
+    """
+    return _generation_view(scopes, None)
+
+
+def profile_scopes(*user_ids):
+    # Автор может быть уже удалён каскадом, поэтому без post.author.
+    usernames = User.objects.filter(
+        pk__in=user_ids
+    ).values_list('username', flat=True)
+    return [PROFILE.format(username=name) for name in usernames]
+
+
+def post_scopes(post_id):
+    """Области страницы поста: сам пост, профиль автора и группа."""
+    row = Post.objects.filter(pk=post_id).values_list(
+        'author__username', 'group__slug'
+    ).first()
+    if row is None:
+        return [POST.format(post_id=post_id)]
+    username, slug = row
+    return [
+        POST.format(post_id=post_id),
+        PROFILE.format(username=username),
+        *([GROUP.format(slug=slug)] if slug else []),
+    ]
+
+
+def invalidate_post(post, *group_ids):
+    """Сбросить страницы, на которых виден пост."""
+    slugs = Group.objects.filter(
+        pk__in=[pk for pk in (post.group_id, *group_ids) if pk]
+    ).values_list('slug', flat=True)
+    bump(
+        INDEX,
+        POST.format(post_id=post.pk),
+        *profile_scopes(post.author_id),
+        *(GROUP.format(slug=slug) for slug in slugs),
+    )
@@ -0,0 +1,181 @@
+"""Лента подписок: fan-out on write с откатом на fan-out on read.
+
+Новый пост сразу раскладывается по лентам подписчиков автора
+(таблица FeedEntry), и ``follow_index`` читает одну ленту одним
+диапазоном по индексу. Посты авторов, у которых подписчиков больше
+``FEED_FANOUT_LIMIT``, не раскладываются: такие авторы подмешиваются
+в ленту при чтении.
+
+Когда автор переходит порог, это замечает ``watch_pull_authors``:
+подписчикам сбрасывается кэш списка таких авторов, а при возврате под
+порог в их ленты дописываются посты, вышедшие без раскладки.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from core.paginator import get_page
+from .models import AuthorStats, FeedEntry, Follow, Post
+
+PULL_AUTHORS_KEY = 'feed:pull_authors:{}'
+PULL_AUTHORS_TIMEOUT = 60 * 5
+BATCH_SIZE = 500
+
+
+def is_pull_author(author_id):
+    """Слишком много подписчиков для раскладки по лентам."""
+    return AuthorStats.objects.filter(
+        author_id=author_id,
+        follower_count__gt=settings.FEED_FANOUT_LIMIT,
+    ).exists()
+
+
+def pull_authors_among(author_ids):
+    return set(
+        AuthorStats.objects.filter(
+            author_id__in=author_ids,
+            follower_count__gt=settings.FEED_FANOUT_LIMIT,
+        ).values_list('author_id', flat=True)
+    )
+
+
+@contextmanager
+def watch_pull_authors(author_ids):
+    """Обработать переход авторов через порог раскладки.
+
+    Оборачивает изменение числа подписчиков авторов ``author_ids``.
+    """
+    author_ids = set(author_ids)
+    before = pull_authors_among(author_ids)
+    yield
+    after = pull_authors_among(author_ids)
+    if before == after:
+        return
+    followers = Follow.objects.filter(
+        author_id__in=before ^ after
+    ).exclude(user=None).values_list('user_id', 'author_id')
+    pairs = set(followers)
+    cache.delete_many(
+        [PULL_AUTHORS_KEY.format(user_id) for user_id, _ in pairs]
+    )
+    # Посты, вышедшие, пока автор читался напрямую, в лентах не лежат.
+    fill_feeds(
+        (user_id, author_id) for user_id, author_id in pairs
+        if author_id in before
+    )
+
+
+def fan_out_post(post):
+    """Положить новый пост в ленты подписчиков автора."""
+    if is_pull_author(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).exclude(user=None).values_list('user_id', flat=True)
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, post_id=post.pk,
+                      pub_date=post.pub_date)
+            for user_id in followers
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fill_feed(user_id, author_id):
+    """Добавить в ленту нового подписчика уже вышедшие посты автора."""
+    fill_feeds({(user_id, author_id)})
+
+
+def fill_feeds(pairs):
+    """``fill_feed`` для многих подписок (id читателя, id автора) сразу."""
+    pairs = set(pairs)
+    if not pairs:
+        return
+    cache.delete_many(
+        [PULL_AUTHORS_KEY.format(user_id) for user_id, _ in pairs]
+    )
+    pull_authors = pull_authors_among(
+        {author_id for _, author_id in pairs}
+    )
+    followers = defaultdict(list)
+    for user_id, author_id in pairs:
+        if author_id not in pull_authors:
+            followers[author_id].append(user_id)
+    posts = Post.objects.filter(author_id__in=followers).values_list(
+        'id', 'author_id', 'pub_date'
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, author_id, pub_date in posts.iterator()
+            for user_id in followers[author_id]
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def clear_feed(user_id, author_id):
+    """Убрать из ленты посты автора после отписки."""
+    clear_feeds(user_id, [author_id])
+
+
+def clear_feeds(user_id, author_ids):
+    cache.delete(PULL_AUTHORS_KEY.format(user_id))
+    FeedEntry.objects.filter(
+        user_id=user_id, post__author_id__in=author_ids
+    ).delete()
+
+
+def get_pull_authors(user):
+    """Авторы из подписок, чьи посты читаются напрямую (fan-out on read)."""
+    key = PULL_AUTHORS_KEY.format(user.pk)
+    authors = cache.get(key)
+    if authors is None:
+        authors = list(
+            AuthorStats.objects.filter(
+                author__following__user=user,
+                follower_count__gt=settings.FEED_FANOUT_LIMIT,
+            ).values_list('author', flat=True)
+        )
+        cache.set(key, authors, PULL_AUTHORS_TIMEOUT)
+    return authors
+
+
+def get_feed_page(request, per_page, numbered=True):
+    """Страница ленты подписок текущего пользователя."""
+    user = request.user
+    pull_authors = get_pull_authors(user)
+    if pull_authors:
+        posts = Post.objects.for_feed().filter(
+            Q(feed_entries__user=user) | Q(author__in=pull_authors)
+        ).distinct()
+        return get_page(request, posts, per_page, numbered=numbered)
+    entries = FeedEntry.objects.filter(user=user).select_related(
+        'post__author', 'post__group'
+    )
+    page = get_page(
+        request, entries, per_page, keys=('-pub_date', '-post_id'),
+        numbered=numbered,
+    )
+    page.object_list = [entry.post for entry in page.object_list]
+    return page
+
+
+def rebuild():
+    """Заново разложить посты по лентам всех подписчиков.
+
+    Нужна после массовой загрузки через bulk_create, которая не посылает
+    сигналов.
+    """
+    FeedEntry.objects.all().delete()
+    follows = Follow.objects.exclude(user=None).values_list(
+        'user_id', 'author_id'
+    )
+    for user_id, author_id in follows.iterator():
+        fill_feed(user_id, author_id)
@@ -0,0 +1,125 @@
+"""Граф подписок: массовые подписки и отписки, кэш подписок читателя.
+
+Подписки вставляются одним ``bulk_create(ignore_conflicts=True)``:
+повторный клик или повторный импорт ничего не ломает, а тысячи строк
+не превращаются в тысячи запросов. Сигналы при этом не посылаются,
+поэтому счётчики, ленты и кэш страниц обновляются здесь же, пачкой.
+Отписки удаляются обычным ``delete()``, и то же самое для каждой
+строки делают сигналы.
+
+``get_followees`` отдаёт множество авторов читателя из кэша: профиль
+и ленты отвечают на «подписан ли» без запроса к базе.
+"""
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import caching, feeds, stats
+from .models import Follow
+
+FOLLOWEES_KEY = 'follows:followees:{}'
+FOLLOWEES_TIMEOUT = 60 * 60
+
+
+def get_followees(user):
+    """Множество id авторов, на которых подписан пользователь."""
+    if not user.is_authenticated:
+        return frozenset()
+    key = FOLLOWEES_KEY.format(user.pk)
+    followees = cache.get(key)
+    if followees is None:
+        followees = frozenset(
+            Follow.objects.filter(user=user).values_list(
+                'author_id', flat=True
+            )
+        )
+        cache.set(key, followees, FOLLOWEES_TIMEOUT)
+    return followees
+
+
+def is_following(user, author):
+    return author.pk in get_followees(user)
+
+
+def forget(*user_ids):
+    """Сбросить кэш подписок читателей после изменения графа."""
+    cache.delete_many([FOLLOWEES_KEY.format(user_id) for user_id in user_ids])
+
+
+def follow(user, *authors):
+    """Подписать пользователя на авторов; уже оформленные подписки
+    и подписка на себя пропускаются."""
+    return bulk_follow((user.pk, author.pk) for author in authors)
+
+
+def unfollow(user, *authors):
+    return bulk_unfollow((user.pk, author.pk) for author in authors)
+
+
+def bulk_follow(pairs, recount=False):
+    """Создать подписки по парам (id читателя, id автора).
+
+    Счётчики меняются на число новых подписок; ``recount=True`` (импорт)
+    пересчитывает их по таблице Follow. Возвращает число новых подписок.
+    """
+    pairs = {(user_id, author_id) for user_id, author_id in pairs
+             if user_id != author_id}
+    if not pairs:
+        return 0
+    user_ids = {user_id for user_id, _ in pairs}
+    author_ids = {author_id for _, author_id in pairs}
+    with transaction.atomic():
+        new_pairs = pairs - set(
+            Follow.objects.filter(
+                user_id__in=user_ids, author_id__in=author_ids
+            ).values_list('user_id', 'author_id')
+        )
+        Follow.objects.bulk_create(
+            (
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id, author_id in new_pairs
+            ),
+            batch_size=feeds.BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        with feeds.watch_pull_authors(author_ids):
+            if recount:
+                stats.refresh_follow_counts(user_ids, author_ids)
+            else:
+                _count(new_pairs)
+        feeds.fill_feeds(new_pairs)
+    _changed(user_ids, author_ids)
+    return len(new_pairs)
+
+
+def bulk_unfollow(pairs):
+    """Удалить подписки по парам (id читателя, id автора).
+
+    Возвращает число удалённых подписок.
+    """
+    authors_by_user = defaultdict(set)
+    for user_id, author_id in pairs:
+        authors_by_user[user_id].add(author_id)
+    deleted = 0
+    with transaction.atomic():
+        for user_id, author_ids in authors_by_user.items():
+            deleted += Follow.objects.filter(
+                user_id=user_id, author_id__in=author_ids
+            ).delete()[0]
+    return deleted
+
+
+def _count(new_pairs):
+    """Прибавить новые подписки к счётчикам без пересчёта всей таблицы."""
+    followers = Counter(author_id for _, author_id in new_pairs)
+    followees = Counter(user_id for user_id, _ in new_pairs)
+    for author_id, count in followers.items():
+        stats.change(author_id, follower_count=count)
+    for user_id, count in followees.items():
+        stats.change(user_id, following_count=count)
+
+
+def _changed(user_ids, author_ids):
+    forget(*user_ids)
+    caching.bump(*caching.profile_scopes(*author_ids))
@@ -1,8 +1,26 @@
 from django import forms
+from core.uploads import too_large_error, validate_image
 from posts.models import Post, Comment
 
 
 class PostForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['image'].validators.append(validate_image)
+        # Файл, оборванный SizeLimitUploadHandler, не отдаём ImageField:
+        # вместо «битой картинки» покажем ошибку о размере.
+        self.image_too_large = getattr(
+            self.files.get('image'), 'too_large', False
+        )
+        if self.image_too_large:
+            self.files = self.files.copy()
+            del self.files['image']
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.image_too_large:
+            self.add_error('image', too_large_error())
+        return cleaned_data
 
     class Meta:
         model = Post
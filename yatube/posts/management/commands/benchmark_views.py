@@ -0,0 +1,107 @@
+import statistics
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.metrics import percentile
+from posts import urls
+from posts.models import Group, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет все адреса приложения posts тестовым клиентом и печатает '
+        'p50/p95 времени ответа, число SQL-запросов, пик памяти и размер '
+        'ответа. Запускайте на заполненной базе (seed_data).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help='Сколько раз запросить каждый адрес.'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом.'
+        )
+        parser.add_argument(
+            '--page', default=None,
+            help='Добавить ?page=N к адресам лент.'
+        )
+
+    def handle(self, *args, **options):
+        client = Client()
+        reader = User.objects.annotate(
+            total=Count('follower')).order_by('-total').first()
+        post = Post.objects.order_by('-pub_date').first()
+        group = Group.objects.annotate(
+            total=Count('posts')).order_by('-total').first()
+        if reader is None or post is None or group is None:
+            raise CommandError('База пуста: сначала запустите seed_data.')
+        client.force_login(reader)
+        values = {
+            'slug': group.slug,
+            'username': post.author.username,
+            'post_id': post.pk,
+        }
+        self.stdout.write(
+            f'{"адрес":<20}{"p50, мс":>10}{"p95, мс":>10}'
+            f'{"SQL":>6}{"память, КБ":>12}{"байт":>10}'
+        )
+        for pattern in urls.urlpatterns:
+            if not pattern.name:
+                continue
+            kwargs = {
+                name: values[name] for name in pattern.pattern.converters
+            }
+            url = reverse(f'posts:{pattern.name}', kwargs=kwargs)
+            if options['page'] and not kwargs.get('post_id'):
+                url = f'{url}?page={options["page"]}'
+            self.report(pattern.name, self.measure(client, url, options))
+
+    def request(self, client, url, cold):
+        if cold:
+            cache.clear()
+        # Подписки и комментарии меняют базу: откатываем всё сделанное.
+        with transaction.atomic():
+            response = client.get(url)
+            transaction.set_rollback(True)
+        return response
+
+    def measure(self, client, url, options):
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            self.request(client, url, options['cold'])
+            timings.append((time.perf_counter() - started) * 1000)
+        # Память и запросы меряем отдельно: трассировка замедляет ответ.
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.request(client, url, options['cold'])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {
+            'p50': statistics.median(timings),
+            'p95': percentile(timings, 0.95),
+            # Без учёта SAVEPOINT/RELEASE от отката.
+            'queries': sum(
+                not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))
+                for query in queries.captured_queries
+            ),
+            'peak': peak / 1024,
+            'size': len(response.content),
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name:<20}{result["p50"]:>10.2f}{result["p95"]:>10.2f}'
+            f'{result["queries"]:>6}{result["peak"]:>12.0f}'
+            f'{result["size"]:>10}'
+        )
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит недостающие миниатюры картинок постов: для постов, '
+        'сохранённых до фоновой обработки, или после очистки кэша sorl.'
+    )
+
+    def handle(self, *args, **options):
+        built, seen = 0, set()
+        posts = Post.objects.exclude(image='').only('pk', 'image')
+        for post in posts.iterator():
+            if post.image.name in seen:
+                continue
+            seen.add(post.image.name)
+            if all(
+                thumbnails.get_srcset(post.image, preset) is not None
+                for preset in settings.THUMBNAIL_PRESETS
+            ):
+                continue
+            thumbnails._generate(post.pk, post.image.name)
+            built += 1
+        self.stdout.write(self.style.SUCCESS(f'Построено: {built}'))
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from core.paginator import NEXT, KeysetPaginator
+from posts.models import Comment, FeedEntry, Follow, Group, Post, User
+from posts.views import NUMBER_POSTS
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает планы запросов лент (EXPLAIN) и время их выполнения. '
+        'Запускайте до и после миграций на заполненной базе (seed_data).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз выполнить каждый запрос для замера времени.'
+        )
+
+    def handle(self, *args, **options):
+        for title, queryset in self.get_queries():
+            plan = queryset.explain()
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                list(queryset)
+            elapsed = (time.perf_counter() - started) / options['repeat']
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(plan)
+            self.stdout.write(f'{elapsed * 1000:.2f} мс на запрос\n\n')
+
+    def get_queries(self):
+        """Первые страницы лент в том виде, в каком их строят views."""
+        def first_page(queryset, keys=('-pub_date', '-id')):
+            paginator = KeysetPaginator(queryset, NUMBER_POSTS, keys=keys)
+            return paginator.get_cursor_queryset()
+
+        def middle_page(queryset):
+            paginator = KeysetPaginator(queryset, NUMBER_POSTS)
+            middle = paginator.object_list[queryset.count() // 2:].first()
+            cursor = middle and paginator.encode_cursor(NEXT, middle)
+            return paginator.get_cursor_queryset(cursor)
+
+        posts = Post.objects.for_feed()
+        yield 'index: первая страница', first_page(posts)
+        yield 'index: страница в середине ленты', middle_page(posts)
+        group = Group.objects.annotate(
+            total=Count('posts')).order_by('-total').first()
+        if group is not None:
+            yield 'group_posts', first_page(posts.filter(group=group))
+        author = User.objects.annotate(
+            total=Count('posts')).order_by('-total').first()
+        if author is not None:
+            yield 'profile', first_page(posts.filter(author=author))
+        reader = User.objects.annotate(
+            total=Count('follower')).order_by('-total').first()
+        if reader is not None:
+            yield 'follow_index', first_page(
+                FeedEntry.objects.filter(user=reader)
+                .select_related('post__author', 'post__group'),
+                keys=('-pub_date', '-post_id'),
+            )
+            yield 'profile: проверка подписки', Follow.objects.filter(
+                user=reader, author=author
+            )
+        post = Post.objects.annotate(
+            total=Count('comments')).order_by('-total').first()
+        if post is not None:
+            yield 'post_detail: комментарии', Comment.objects.filter(
+                post=post
+            ).select_related('author')
@@ -0,0 +1,54 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import follows
+from posts.models import User
+
+# Имена и пары идут в IN-списки запроса: держимся под лимитом
+# параметров SQLite.
+CHUNK = 400
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует подписки из CSV со строками «читатель,автор» '
+        '(имена пользователей). Повторный импорт ничего не дублирует.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл CSV, по умолчанию стандартный ввод.'
+        )
+
+    def handle(self, *args, **options):
+        rows = self.read(options['path'])
+        if any(len(row) != 2 for row in rows):
+            raise CommandError('В каждой строке должно быть два имени.')
+        names = sorted({name for row in rows for name in row})
+        ids = {}
+        for start in range(0, len(names), CHUNK):
+            ids.update(User.objects.filter(
+                username__in=names[start:start + CHUNK]
+            ).values_list('username', 'id'))
+        unknown = set(names) - set(ids)
+        if unknown:
+            raise CommandError(
+                f'Нет пользователей: {", ".join(sorted(unknown))}'
+            )
+        pairs = [(ids[user], ids[author]) for user, author in rows]
+        created = sum(
+            follows.bulk_follow(pairs[start:start + CHUNK], recount=True)
+            for start in range(0, len(pairs), CHUNK)
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Новых подписок: {created} из {len(pairs)}'
+        ))
+
+    def read(self, path):
+        if path == '-':
+            return [row for row in csv.reader(sys.stdin) if row]
+        with open(path, newline='', encoding='utf-8') as file:
+            return [row for row in csv.reader(file) if row]
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import stats
+from posts.models import AuthorStats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов и подписок авторов.'
+
+    def handle(self, *args, **options):
+        stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано авторов: {AuthorStats.objects.count()}'
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Заново строит полнотекстовый индекс постов и комментариев.'
+
+    def handle(self, *args, **options):
+        if not search.rebuild():
+            raise CommandError('В этой базе нет индекса FTS5.')
+        self.stdout.write(self.style.SUCCESS('Индекс поиска перестроен.'))
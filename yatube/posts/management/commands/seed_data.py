@@ -0,0 +1,177 @@
+import io
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from PIL import Image
+
+from posts import feeds, search, stats
+from posts.models import Comment, Follow, Group, Post, User
+
+CHUNK = 5000
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Временно отключить auto_now_add, чтобы задать даты самим."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def chunks(total):
+    for start in range(0, total, CHUNK):
+        yield range(start, min(start + CHUNK, total))
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами '
+        '(с картинками), комментариями и подписками через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=1000)
+        parser.add_argument('--follows', type=int, default=500)
+        parser.add_argument(
+            '--images', type=int, default=5,
+            help='Сколько разных картинок создать для постов.'
+        )
+        parser.add_argument(
+            '--image-ratio', type=float, default=0.2,
+            help='Доля постов с картинкой.'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить даты публикации.'
+        )
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.period = timedelta(days=options['days']).total_seconds()
+        prefix = f'seed{User.objects.count()}_'
+        user_ids = self.create_users(prefix, options['users'])
+        group_ids = self.create_groups(prefix, options['groups'])
+        images = self.create_images(prefix, options['images'])
+        post_ids = self.create_posts(
+            options['posts'], user_ids, group_ids,
+            images, options['image_ratio'],
+        )
+        self.create_comments(options['comments'], user_ids, post_ids)
+        self.create_follows(options['follows'], user_ids)
+        self.stdout.write('Пересчёт счётчиков, лент подписок и поиска...')
+        stats.rebuild()
+        feeds.rebuild()
+        search.rebuild()
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS('Готово.'))
+
+    def random_date(self):
+        return self.now - timedelta(
+            seconds=self.random.uniform(0, self.period)
+        )
+
+    def create_users(self, prefix, total):
+        for numbers in chunks(total):
+            User.objects.bulk_create(
+                User(username=f'{prefix}{number}', password='!',
+                     first_name='Автор', last_name=str(number))
+                for number in numbers
+            )
+        self.stdout.write(f'Пользователей: {total}')
+        return list(User.objects.filter(
+            username__startswith=prefix
+        ).values_list('id', flat=True))
+
+    def create_groups(self, prefix, total):
+        Group.objects.bulk_create(
+            Group(title=f'Группа {number}', slug=f'{prefix}{number}',
+                  description=f'Описание группы {number}')
+            for number in range(total)
+        )
+        self.stdout.write(f'Групп: {total}')
+        return list(Group.objects.filter(
+            slug__startswith=prefix
+        ).values_list('id', flat=True))
+
+    def create_images(self, prefix, total):
+        # То же хранилище, что у поля: имена по хэшу, как у загрузок.
+        storage = Post._meta.get_field('image').storage
+        names = []
+        for number in range(total):
+            buffer = io.BytesIO()
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            Image.new('RGB', (1280, 720), color).save(buffer, 'JPEG')
+            names.append(storage.save(
+                f'posts/{prefix}{number}.jpg', ContentFile(buffer.getvalue())
+            ))
+        return names
+
+    def create_posts(self, total, user_ids, group_ids, images, image_ratio):
+        last_id = Post.objects.order_by('-id').values_list(
+            'id', flat=True).first() or 0
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            for numbers in chunks(total):
+                Post.objects.bulk_create(
+                    Post(
+                        text=f'Синтетический пост {number}. ' * 5,
+                        author_id=self.random.choice(user_ids),
+                        group_id=(
+                            self.random.choice(group_ids)
+                            if group_ids and self.random.random() < 0.5
+                            else None
+                        ),
+                        image=(
+                            self.random.choice(images)
+                            if images and self.random.random() < image_ratio
+                            else ''
+                        ),
+                        pub_date=self.random_date(),
+                    )
+                    for number in numbers
+                )
+                self.stdout.write(f'Постов: {numbers.stop}/{total}')
+        return list(Post.objects.filter(
+            id__gt=last_id
+        ).values_list('id', flat=True))
+
+    def create_comments(self, total, user_ids, post_ids):
+        if not post_ids:
+            return
+        with explicit_dates(Comment._meta.get_field('created')):
+            for numbers in chunks(total):
+                Comment.objects.bulk_create(
+                    Comment(
+                        text=f'Комментарий {number}',
+                        author_id=self.random.choice(user_ids),
+                        post_id=self.random.choice(post_ids),
+                        created=self.random_date(),
+                    )
+                    for number in numbers
+                )
+        self.stdout.write(f'Комментариев: {total}')
+
+    def create_follows(self, total, user_ids):
+        if len(user_ids) < 2:
+            return
+        pairs = set()
+        while len(pairs) < min(total, len(user_ids) * (len(user_ids) - 1)):
+            pairs.add(tuple(self.random.sample(user_ids, 2)))
+        Follow.objects.bulk_create(
+            (Follow(user_id=user, author_id=author) for user, author in pairs),
+            ignore_conflicts=True,
+        )
+        self.stdout.write(f'Подписок: {len(pairs)}')
@@ -0,0 +1,52 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+from core.stemmer import stem_words
+
+TABLE = 'posts_post_fts'
+
+
+def create_index(apps, schema_editor):
+    # FTS5 есть только в SQLite, и то не в каждой сборке: без него поиск
+    # просто остаётся на LIKE.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5('
+                f"text, comments, tokenize='unicode61 remove_diacritics 0')"
+            )
+        except OperationalError:
+            return
+        Post = apps.get_model('posts', 'Post')
+        Comment = apps.get_model('posts', 'Comment')
+        comments = {}
+        for post_id, text in Comment.objects.values_list('post_id', 'text'):
+            comments.setdefault(post_id, []).append(text)
+        for post_id, text in Post.objects.values_list('id', 'text'):
+            cursor.execute(
+                f'INSERT INTO {TABLE} (rowid, text, comments) '
+                f'VALUES (%s, %s, %s)',
+                [
+                    post_id,
+                    ' '.join(stem_words(text)),
+                    ' '.join(stem_words(' '.join(comments.get(post_id, [])))),
+                ],
+            )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
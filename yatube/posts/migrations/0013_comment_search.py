@@ -0,0 +1,90 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+from core.stemmer import stem_words
+
+TABLE = 'posts_post_fts'
+COMMENT_TABLE = 'posts_comment_fts'
+TOKENIZE = "tokenize='unicode61 remove_diacritics 0'"
+
+
+def stemmed(text):
+    return ' '.join(stem_words(text))
+
+
+def split_index(apps, schema_editor):
+    # Комментарии переезжают в свою таблицу, по строке на комментарий:
+    # новый комментарий больше не переиндексирует весь пост.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE {COMMENT_TABLE} USING fts5('
+                f'post_id UNINDEXED, text, {TOKENIZE})'
+            )
+        except OperationalError:
+            return
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE {TABLE} USING fts5(text, {TOKENIZE})'
+        )
+        Post = apps.get_model('posts', 'Post')
+        Comment = apps.get_model('posts', 'Comment')
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)',
+            [
+                (post_id, stemmed(text))
+                for post_id, text in Post.objects.values_list('id', 'text')
+            ],
+        )
+        cursor.executemany(
+            f'INSERT INTO {COMMENT_TABLE} (rowid, post_id, text) '
+            f'VALUES (%s, %s, %s)',
+            [
+                (comment_id, post_id, stemmed(text))
+                for comment_id, post_id, text in Comment.objects.values_list(
+                    'id', 'post_id', 'text'
+                )
+            ],
+        )
+
+
+def join_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {COMMENT_TABLE}')
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+        try:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE {TABLE} USING fts5('
+                f'text, comments, {TOKENIZE})'
+            )
+        except OperationalError:
+            return
+        Post = apps.get_model('posts', 'Post')
+        Comment = apps.get_model('posts', 'Comment')
+        comments = {}
+        for post_id, text in Comment.objects.values_list('post_id', 'text'):
+            comments.setdefault(post_id, []).append(text)
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, text, comments) '
+            f'VALUES (%s, %s, %s)',
+            [
+                (post_id, stemmed(text),
+                 stemmed(' '.join(comments.get(post_id, []))))
+                for post_id, text in Post.objects.values_list('id', 'text')
+            ],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_image_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_index, join_index),
+    ]
@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
-from django.db.models import UniqueConstraint
+from django.db.models import F, UniqueConstraint
+
+from core.storage import ContentAddressedStorage
 
 User = get_user_model()
 
@@ -16,6 +18,12 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: автор и группа загружаются тем же запросом."""
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -40,21 +48,49 @@ class Post(models.Model):
         verbose_name='Группа',
         help_text='Выберите группу'
     )
-    # Поле для картинки (необязательное)
+    # Поле для картинки (необязательное). Файлы хранятся по хэшу
+    # содержимого: повторная загрузка той же картинки не копирует её.
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
-        blank=True
+        storage=ContentAddressedStorage(),
+        blank=True,
+        # По имени файла ищутся ссылающиеся посты перед его удалением.
+        db_index=True,
     )
+    # Увеличивается при каждом сохранении: входит в ключ кэша фрагмента.
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # Индексы под фильтр и сортировку каждой ленты.
+        indexes = [
+            models.Index(fields=['pub_date'], name='post_pub_date'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='post_author_pub_date'),
+            models.Index(fields=['group', 'pub_date'],
+                         name='post_group_pub_date'),
+        ]
 
     def __str__(self):
         return self.text[:NUM_SYMBOLS]
 
+    def save(self, *args, **kwargs):
+        # Картинка сохраняется под блокировкой имени в хранилище:
+        # пост должен попасть в базу в той же транзакции.
+        with transaction.atomic():
+            # Версию увеличивает база: одновременные сохранения не получат
+            # один номер, а фрагменты шаблонов — устаревший ключ.
+            if self.pk is not None and Post.objects.filter(
+                pk=self.pk
+            ).update(version=F('version') + 1):
+                self.refresh_from_db(fields=['version'])
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE,
@@ -71,6 +107,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['created']
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='comment_post_created'),
+        ]
 
 
 class Follow(models.Model):
@@ -85,4 +125,41 @@ class Follow(models.Model):
                              null=True)
 
     class Meta:
-        UniqueConstraint(fields=['author', 'user'], name='follow_unique')
+        constraints = [
+            UniqueConstraint(fields=['user', 'author'], name='follow_unique'),
+        ]
+
+
+class FeedEntry(models.Model):
+    """Запись в ленте подписок пользователя (fan-out on write)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE,
+                             related_name='feed_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE,
+                             related_name='feed_entries')
+    # Копия Post.pub_date: лента читается одним диапазоном по индексу.
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        # Именно post_id: сортировка по '-post' подтянула бы Post.ordering.
+        ordering = ['-pub_date', '-post_id']
+        constraints = [
+            UniqueConstraint(fields=['user', 'post'],
+                             name='feed_entry_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='feed_entry_user_date'),
+        ]
+
+
+class AuthorStats(models.Model):
+    """Счётчики автора: профиль не пересчитывает строки при каждом показе."""
+    author = models.OneToOneField(User, on_delete=models.CASCADE,
+                                  primary_key=True, related_name='stats')
+    post_count = models.PositiveIntegerField('Постов', default=0)
+    follower_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
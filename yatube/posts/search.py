@@ -0,0 +1,196 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+В виртуальной таблице ``posts_post_fts`` на каждый пост (rowid = id
+поста) хранятся основы слов его текста, в ``posts_comment_fts`` — по
+строке на комментарий (rowid = id комментария, рядом id поста), так что
+новый комментарий индексируется одной вставкой, а не переиндексацией
+всей ветки. Пост находится, если запрос подходит к его тексту или
+к одному из комментариев. Основы считает ``core.stemmer``, поэтому
+«подписки» находятся по запросу «подписка». Таблицы держат
+в актуальном состоянии сигналы (после bulk_create — команда
+rebuild_search_index), создают их миграции 0011 и 0013 — если
+в сборке SQLite нет FTS5 или база другая, поиск откатывается на ``LIKE``
+в админке и пустую выдачу на сайте.
+"""
+from functools import lru_cache
+
+from django.core.paginator import Page, Paginator
+from django.db import connection, transaction
+
+from core.paginator import NEXT, PREVIOUS, dump_cursor, load_cursor
+from core.stemmer import stem_words
+from .models import Comment, Post
+
+TABLE = 'posts_post_fts'
+COMMENT_TABLE = 'posts_comment_fts'
+# Совпадение в тексте поста весит больше, чем в комментариях.
+COMMENT_WEIGHT = 0.3
+# Все совпадения поста: его текст и комментарии, ранги складываются.
+MATCHES = (
+    f'SELECT rowid AS post_id, bm25({TABLE}) AS score FROM {TABLE} '
+    f'WHERE {TABLE} MATCH %s UNION ALL '
+    f'SELECT post_id, %s * bm25({COMMENT_TABLE}) FROM {COMMENT_TABLE} '
+    f'WHERE {COMMENT_TABLE} MATCH %s'
+)
+
+
+@lru_cache(maxsize=None)
+def is_available():
+    return connection.vendor == 'sqlite' and \
+        {TABLE, COMMENT_TABLE} <= set(connection.introspection.table_names())
+
+
+def stemmed(text):
+    return ' '.join(stem_words(text))
+
+
+def match_expression(query):
+    """Запрос FTS5: все основы слов запроса, каждая как префикс."""
+    return ' '.join(f'"{word}"*' for word in stem_words(query)) or None
+
+
+def index_post(post_id):
+    """Переиндексировать текст поста; комментарии не трогаются."""
+    if not is_available():
+        return
+    text = Post.objects.filter(
+        pk=post_id
+    ).values_list('text', flat=True).first()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+        if text is not None:
+            cursor.execute(
+                f'INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)',
+                [post_id, stemmed(text)],
+            )
+
+
+def index_comment(comment_id):
+    """Переиндексировать один комментарий."""
+    if not is_available():
+        return
+    row = Comment.objects.filter(
+        pk=comment_id
+    ).values_list('post_id', 'text').first()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {COMMENT_TABLE} WHERE rowid = %s', [comment_id]
+        )
+        if row is not None:
+            post_id, text = row
+            cursor.execute(
+                f'INSERT INTO {COMMENT_TABLE} (rowid, post_id, text) '
+                f'VALUES (%s, %s, %s)',
+                [comment_id, post_id, stemmed(text)],
+            )
+
+
+def rebuild():
+    """Заново проиндексировать все посты и комментарии.
+
+    Нужна после массовой загрузки через bulk_create, которая не посылает
+    сигналов. Возвращает False, если индекса нет.
+    """
+    if not is_available():
+        return False
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(f'DELETE FROM {COMMENT_TABLE}')
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)',
+            (
+                (post_id, stemmed(text)) for post_id, text
+                in Post.objects.values_list('id', 'text').iterator()
+            ),
+        )
+        cursor.executemany(
+            f'INSERT INTO {COMMENT_TABLE} (rowid, post_id, text) '
+            f'VALUES (%s, %s, %s)',
+            (
+                (comment_id, post_id, stemmed(text))
+                for comment_id, post_id, text in Comment.objects.values_list(
+                    'id', 'post_id', 'text'
+                ).iterator()
+            ),
+        )
+    return True
+
+
+def _match_params(match):
+    return [match, COMMENT_WEIGHT, match]
+
+
+def filter_posts(queryset, query):
+    """Посты из queryset, подходящие под запрос, или None без индекса."""
+    if not is_available():
+        return None
+    match = match_expression(query)
+    if match is None:
+        return queryset.none()
+    # Не RawSQL: в pk__in он попадает в двойные скобки и превращается
+    # в скалярный подзапрос, возвращающий одну строку.
+    meta = queryset.model._meta
+    column = '.'.join(map(
+        connection.ops.quote_name, (meta.db_table, meta.pk.column)
+    ))
+    return queryset.extra(
+        where=[f'{column} IN (SELECT post_id FROM ({MATCHES}))'],
+        params=_match_params(match),
+    )
+
+
+def _ranked(match, direction, after, limit):
+    """Строки (ранг, id) по возрастанию bm25 после ключа ``after``."""
+    backwards = direction == PREVIOUS
+    sql = (
+        f'SELECT score, rowid FROM (SELECT post_id AS rowid, '
+        f'SUM(score) AS score FROM ({MATCHES}) GROUP BY post_id)'
+    )
+    params = _match_params(match)
+    if after is not None:
+        operator = '<' if backwards else '>'
+        sql += (
+            f' WHERE score {operator} %s '
+            f'OR (score = %s AND rowid {operator} %s)'
+        )
+        params += [after[0], *after]
+    order = 'DESC' if backwards else 'ASC'
+    sql += f' ORDER BY score {order}, rowid {order} LIMIT %s'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*params, limit])
+        return cursor.fetchall()
+
+
+def search(query, cursor=None, per_page=10):
+    """Страница выдачи по релевантности с пагинацией по ключу (ранг, id).
+
+    Ранг bm25 зависит от всего корпуса, поэтому после публикации новых
+    постов соседние страницы могут слегка сдвинуться — как и в ленте.
+    """
+    direction, after = NEXT, None
+    if cursor:
+        try:
+            direction, after = load_cursor(cursor, 2)
+            after = (float(after[0]), int(after[1]))
+        except (TypeError, ValueError):
+            direction, after = NEXT, None
+    match = match_expression(query)
+    rows = []
+    if match is not None and is_available():
+        rows = _ranked(match, direction, after, per_page + 1)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == PREVIOUS:
+        rows.reverse()
+        has_next, has_previous = after is not None, has_more
+    else:
+        has_next, has_previous = has_more, after is not None
+    posts = Post.objects.for_feed().in_bulk([rowid for _, rowid in rows])
+    object_list = [posts[rowid] for _, rowid in rows if rowid in posts]
+    page = Page(object_list, 1, Paginator(object_list, per_page))
+    page.is_keyset = True
+    page.next_cursor = dump_cursor(NEXT, list(rows[-1])) \
+        if rows and has_next else None
+    page.previous_cursor = dump_cursor(PREVIOUS, list(rows[0])) \
+        if rows and has_previous else None
+    return page
@@ -0,0 +1,75 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, feeds, follows, search, stats, thumbnails
+from .caching import invalidate_post, profile_scopes
+from .models import Comment, Follow, Group, Post
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    # Запоминаем прежнюю группу: её страницу тоже нужно сбросить.
+    # Прежняя картинка освобождается, если её заменили.
+    previous = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', 'image'
+    ).first() if instance.pk else None
+    instance._previous_group_id, instance._previous_image = \
+        previous or (None, '')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.change(instance.author_id, post_count=1)
+        feeds.fan_out_post(instance)
+    invalidate_post(instance, getattr(instance, '_previous_group_id', None))
+    thumbnails.schedule(instance)
+    previous_image = getattr(instance, '_previous_image', '')
+    if previous_image and previous_image != instance.image.name:
+        transaction.on_commit(lambda: thumbnails.release(previous_image))
+    search.index_post(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    stats.change(instance.author_id, post_count=-1)
+    invalidate_post(instance)
+    search.index_post(instance.pk)
+    name = instance.image.name
+    transaction.on_commit(lambda: thumbnails.release(name))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    caching.bump(caching.POST.format(post_id=instance.post_id))
+    search.index_comment(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created and instance.user_id:
+        with feeds.watch_pull_authors([instance.author_id]):
+            stats.change(instance.author_id, follower_count=1)
+        stats.change(instance.user_id, following_count=1)
+        feeds.fill_feed(instance.user_id, instance.author_id)
+        follows.forget(instance.user_id)
+    caching.bump(*profile_scopes(instance.author_id))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    if instance.user_id:
+        with feeds.watch_pull_authors([instance.author_id]):
+            stats.change(instance.author_id, follower_count=-1)
+        stats.change(instance.user_id, following_count=-1)
+        feeds.clear_feed(instance.user_id, instance.author_id)
+        follows.forget(instance.user_id)
+    caching.bump(*profile_scopes(instance.author_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    caching.bump(caching.GROUP.format(slug=instance.slug))
@@ -0,0 +1,78 @@
+"""Денормализованные счётчики авторов (AuthorStats)."""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Follow, Post, User
+
+
+def change(author_id, **deltas):
+    """Атомарно изменить счётчики: ``change(pk, post_count=1)``."""
+    expressions = {field: F(field) + delta for field, delta in deltas.items()}
+    stats = AuthorStats.objects.filter(author_id=author_id)
+    if stats.update(**expressions) or min(deltas.values()) < 0:
+        # Уменьшать отсутствующую строку не нужно: автор удаляется.
+        return
+    AuthorStats.objects.get_or_create(author_id=author_id)
+    stats.update(**expressions)
+
+
+def refresh_follow_counts(user_ids, author_ids):
+    """Пересчитать счётчики подписок по таблице Follow.
+
+    Для массовых подписок: пересчёт не зависит от того, сколько строк
+    на самом деле вставил ``bulk_create(ignore_conflicts=True)``.
+    """
+    AuthorStats.objects.bulk_create(
+        (AuthorStats(author_id=pk) for pk in {*user_ids, *author_ids}),
+        ignore_conflicts=True,
+    )
+    for field, column, ids in (
+        ('follower_count', 'author', author_ids),
+        ('following_count', 'user', user_ids),
+    ):
+        counts = Follow.objects.filter(
+            **{column: OuterRef('author_id')}
+        ).exclude(user=None).order_by().values(column).annotate(
+            count=Count('id')
+        ).values('count')
+        AuthorStats.objects.filter(author_id__in=ids).update(
+            **{field: Coalesce(Subquery(counts), 0)}
+        )
+
+
+def get_stats(author):
+    """Счётчики автора; у нового автора строки ещё может не быть."""
+    return (
+        AuthorStats.objects.filter(author=author).first()
+        or AuthorStats(author=author)
+    )
+
+
+def rebuild():
+    """Пересчитать счётчики всех авторов по таблицам постов и подписок."""
+    post_counts = dict(
+        Post.objects.order_by().values_list('author').annotate(Count('id'))
+    )
+    follower_counts = dict(
+        Follow.objects.exclude(user=None)
+        .values_list('author').annotate(Count('id'))
+    )
+    following_counts = dict(
+        Follow.objects.exclude(user=None)
+        .values_list('user').annotate(Count('id'))
+    )
+    with transaction.atomic():
+        AuthorStats.objects.all().delete()
+        AuthorStats.objects.bulk_create(
+            (
+                AuthorStats(
+                    author_id=user_id,
+                    post_count=post_counts.get(user_id, 0),
+                    follower_count=follower_counts.get(user_id, 0),
+                    following_count=following_counts.get(user_id, 0),
+                )
+                for user_id in User.objects.values_list('id', flat=True)
+            ),
+            batch_size=500,
+        )
@@ -0,0 +1,35 @@
+from django import template
+from django.conf import settings
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/responsive_image.html')
+def responsive_image(post, preset, css_class=''):
+    """<picture> с вариантами миниатюры для srcset.
+
+    Пока варианты не готовы, показывается оригинал без srcset.
+    """
+    context = {'css_class': css_class}
+    if not post.image:
+        return context
+    geometry, _ = settings.THUMBNAIL_PRESETS[preset]
+    width, height = geometry.split('x')
+    srcset = thumbnails.get_srcset(post.image, preset)
+    if srcset is None:
+        context['src'] = post.image.url
+        return context
+    context.update({
+        'src': thumbnails.get_ready(post.image, preset).url,
+        'srcset': srcset.pop('JPEG'),
+        'sources': [
+            {'type': thumbnails.MIME_TYPES[image_format], 'srcset': value}
+            for image_format, value in srcset.items()
+        ],
+        'sizes': f'(max-width: {width}px) 100vw, {width}px',
+        'width': width,
+        'height': height,
+    })
+    return context
@@ -0,0 +1,104 @@
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}'
+            )
+            for number in range(3)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.author, text='Комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_posts_keyset_pages_and_fields(self):
+        url = reverse('api:posts')
+        first = self.client.get(url, {'limit': 2, 'fields': 'id,author'})
+        data = first.json()
+        self.assertEqual(
+            data['results'],
+            [{'id': post.pk, 'author': 'author'}
+             for post in self.posts[:0:-1]],
+        )
+        self.assertIsNone(data['previous'])
+        second = self.client.get(data['next']).json()
+        self.assertEqual(
+            [post['id'] for post in second['results']], [self.posts[0].pk]
+        )
+        self.assertIsNone(second['next'])
+
+    def test_unknown_field_is_bad_request(self):
+        response = self.client.get(reverse('api:posts'), {'fields': 'x'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('x', response.json()['detail'])
+
+    def test_missing_post_is_json_404(self):
+        response = self.client.get(
+            reverse('api:post_detail', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertIn('detail', response.json())
+
+    def test_comments_and_groups(self):
+        comments = self.client.get(reverse(
+            'api:post_comments', kwargs={'post_id': self.posts[0].pk}
+        )).json()
+        self.assertEqual(comments['results'][0]['text'], 'Комментарий')
+        groups = self.client.get(reverse('api:groups')).json()
+        self.assertEqual(groups['results'][0]['slug'], 'group')
+
+    def test_follow_feed_requires_login(self):
+        url = reverse('api:follow')
+        self.assertEqual(
+            self.client.get(url).status_code, HTTPStatus.UNAUTHORIZED
+        )
+        reader = User.objects.create(username='reader')
+        Follow.objects.create(user=reader, author=self.author)
+        client = Client()
+        client.force_login(reader)
+        self.assertEqual(len(client.get(url).json()['results']), 3)
+
+    def test_follow_feed_ignores_page_number(self):
+        """?page= не ломает ленту: API всегда отдаёт страницы с курсорами."""
+        reader = User.objects.create(username='reader')
+        Follow.objects.create(user=reader, author=self.author)
+        self.client.force_login(reader)
+        response = self.client.get(
+            reverse('api:follow'), {'page': 1, 'limit': 2}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        data = response.json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertIn('cursor=', data['next'])
+        self.assertNotIn('page=', data['next'])
+
+    def test_ndjson_export_streams_history(self):
+        response = self.client.get(
+            reverse('api:export_group', kwargs={'slug': 'group'})
+        )
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)['id'] for line in lines],
+            [post.pk for post in self.posts],
+        )
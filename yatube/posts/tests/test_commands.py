@@ -0,0 +1,52 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.storage import is_hashed_name
+from posts import search
+from posts.models import AuthorStats, Comment, FeedEntry, Follow, Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedDataTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seed_data_keeps_derived_tables_consistent(self):
+        """seed_data создаёт объекты и пересчитывает счётчики и ленты."""
+        call_command(
+            'seed_data', users=5, groups=2, posts=30, comments=10,
+            follows=6, images=1, seed=1, stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 10)
+        self.assertEqual(Follow.objects.count(), 6)
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list('post_count', flat=True)), 30
+        )
+        expected = Post.objects.filter(
+            author__following__isnull=False
+        ).count()
+        self.assertEqual(FeedEntry.objects.count(), expected)
+        images = Post.objects.exclude(image='').values_list('image', flat=True)
+        self.assertTrue(images)
+        self.assertTrue(all(map(is_hashed_name, images)))
+        self.assertEqual(len(search.search('синтетический', per_page=50)), 30)
+
+    def test_benchmark_views_reports_every_url(self):
+        call_command(
+            'seed_data', users=3, posts=5, comments=2, follows=2,
+            images=0, seed=1, stdout=StringIO(),
+        )
+        out = StringIO()
+        call_command('benchmark_views', repeat=2, stdout=out)
+        for name in ('main', 'follow_index', 'profile_unfollow'):
+            self.assertIn(name, out.getvalue())
@@ -0,0 +1,163 @@
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import follows, stats
+from posts.management.commands import import_follows
+from posts.models import FeedEntry, Follow, Post
+from posts.stats import get_stats
+
+User = get_user_model()
+
+
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def test_new_post_fanned_out(self):
+        """Новый пост попадает в ленту подписчика при публикации."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [post])
+
+    def test_follow_fills_and_unfollow_clears_feed(self):
+        """Подписка добавляет старые посты, отписка их убирает."""
+        post = Post.objects.create(author=self.author, text='Старый пост')
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        follow.delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_popular_author_read_on_demand(self):
+        """Посты популярного автора подмешиваются при чтении ленты."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост звезды')
+        self.assertFalse(FeedEntry.objects.exists())
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [post])
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_crossing_fanout_limit_keeps_feed(self):
+        """Переход автора через порог в обе стороны не теряет посты:
+        кэш авторов для чтения сбрасывается, ленты дописываются."""
+        cache.clear()
+        Follow.objects.create(user=self.reader, author=self.author)
+        old = Post.objects.create(author=self.author, text='До порога')
+        feed = reverse('posts:follow_index')
+        self.assertEqual(
+            list(self.client.get(feed).context['page_obj']), [old]
+        )
+        other = User.objects.create(username='other')
+        follow = Follow.objects.create(user=other, author=self.author)
+        pulled = Post.objects.create(author=self.author, text='За порогом')
+        self.assertFalse(FeedEntry.objects.filter(post=pulled).exists())
+        self.assertEqual(
+            list(self.client.get(feed).context['page_obj']), [pulled, old]
+        )
+        follow.delete()
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=pulled).exists()
+        )
+        self.assertEqual(
+            list(self.client.get(feed).context['page_obj']), [pulled, old]
+        )
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username='reader')
+        cls.authors = [
+            User.objects.create(username=f'author{number}')
+            for number in range(3)
+        ]
+        for author in cls.authors:
+            Post.objects.create(author=author, text=f'Пост {author}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bulk_follow_is_idempotent(self):
+        """Повторная подписка ничего не дублирует и не сбивает счётчики."""
+        self.assertEqual(follows.follow(self.reader, *self.authors), 3)
+        self.assertEqual(follows.follow(self.reader, *self.authors), 0)
+        self.assertEqual(follows.follow(self.reader, self.reader), 0)
+        self.assertEqual(Follow.objects.count(), 3)
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(),
+                         3)
+        self.assertEqual(get_stats(self.reader).following_count, 3)
+        self.assertEqual(get_stats(self.authors[0]).follower_count, 1)
+
+    def test_follow_counts_without_recount(self):
+        """Подписка прибавляет к счётчикам, а не пересчитывает подписчиков
+        популярного автора."""
+        with mock.patch.object(stats, 'refresh_follow_counts') as recount:
+            follows.follow(self.reader, self.authors[0])
+        recount.assert_not_called()
+        self.assertEqual(get_stats(self.reader).following_count, 1)
+        self.assertEqual(get_stats(self.authors[0]).follower_count, 1)
+
+    def test_bulk_unfollow(self):
+        """Отписка от нескольких авторов чистит ленту и счётчики."""
+        follows.follow(self.reader, *self.authors)
+        self.assertEqual(follows.unfollow(self.reader, *self.authors[:2]), 2)
+        self.assertEqual(get_stats(self.reader).following_count, 1)
+        self.assertEqual(get_stats(self.authors[0]).follower_count, 0)
+        self.assertEqual(
+            [entry.post.author for entry in FeedEntry.objects.all()],
+            self.authors[2:],
+        )
+
+    def test_followees_answered_from_cache(self):
+        """«Подписан ли» читается из кэша и сбрасывается при изменениях."""
+        self.assertFalse(follows.is_following(self.reader, self.authors[0]))
+        follows.follow(self.reader, self.authors[0])
+        with self.assertNumQueries(1):
+            self.assertTrue(
+                follows.is_following(self.reader, self.authors[0])
+            )
+            self.assertFalse(
+                follows.is_following(self.reader, self.authors[1])
+            )
+        Follow.objects.filter(author=self.authors[0]).get().delete()
+        self.assertFalse(follows.is_following(self.reader, self.authors[0]))
+
+    def test_import_follows_command(self):
+        """Импорт из CSV создаёт подписки пачкой и не дублирует их."""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as file:
+            file.write('reader,author0\nreader,author1\nreader,author0\n')
+            file.flush()
+            for created in (2, 0):
+                out = StringIO()
+                call_command('import_follows', file.name, stdout=out)
+                self.assertIn(f'Новых подписок: {created} из 3',
+                              out.getvalue())
+        self.assertEqual(Follow.objects.count(), 2)
+        self.assertEqual(get_stats(self.reader).following_count, 2)
+
+    def test_import_follows_chunks_names(self):
+        """Имена из CSV ищутся пачками, как и пары."""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as file:
+            file.write('reader,author0\nauthor1,author2\n')
+            file.flush()
+            with mock.patch.object(import_follows, 'CHUNK', 2):
+                call_command('import_follows', file.name, stdout=StringIO())
+        self.assertEqual(Follow.objects.count(), 2)
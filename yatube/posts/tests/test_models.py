@@ -1,6 +1,9 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
-from posts.models import Group, Post
+from posts.models import AuthorStats, Follow, Group, Post
 
 User = get_user_model()
 
@@ -28,3 +31,45 @@ class PostModelTest(TestCase):
         expected_object_group = group.title
         self.assertEqual(expected_object_group, str(group))
         self.assertEqual(expected_object_post, str(post))
+
+    def test_concurrent_saves_get_distinct_versions(self):
+        """Два сохранения одного поста из разных копий — две версии."""
+        first = Post.objects.get(pk=PostModelTest.post.pk)
+        second = Post.objects.get(pk=PostModelTest.post.pk)
+        first.save()
+        second.save()
+        self.assertEqual((first.version, second.version), (2, 3))
+        PostModelTest.post.refresh_from_db()
+        self.assertEqual(PostModelTest.post.version, 3)
+
+
+class AuthorStatsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def test_counters_follow_changes(self):
+        """Счётчики меняются вместе с постами и подписками."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        stats = AuthorStats.objects.get(author=self.author)
+        self.assertEqual(stats.post_count, 1)
+        self.assertEqual(stats.follower_count, 1)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.reader).following_count, 1
+        )
+        post.delete()
+        follow.delete()
+        stats.refresh_from_db()
+        self.assertEqual(stats.post_count, 0)
+        self.assertEqual(stats.follower_count, 0)
+
+    def test_rebuild_command(self):
+        """Команда пересчитывает разошедшиеся счётчики."""
+        Post.objects.create(author=self.author, text='Пост')
+        AuthorStats.objects.filter(author=self.author).update(post_count=42)
+        call_command('rebuild_author_stats', stdout=StringIO())
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).post_count, 1
+        )
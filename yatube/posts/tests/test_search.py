@@ -0,0 +1,103 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.in_text = Post.objects.create(
+            author=self.author, text='Зимние подписки на журналы'
+        )
+        self.in_comment = Post.objects.create(
+            author=self.author, text='Пост без ключевого слова'
+        )
+        Comment.objects.create(
+            post=self.in_comment, author=self.author, text='Оформил подписку'
+        )
+        Post.objects.create(author=self.author, text='Совсем другое')
+
+    def found(self, query, **kwargs):
+        return list(search.search(query, **kwargs))
+
+    def test_stemmed_match_ranks_text_above_comments(self):
+        self.assertEqual(
+            self.found('подписка'), [self.in_text, self.in_comment]
+        )
+
+    def test_index_follows_changes(self):
+        self.in_text.text = 'Летний отпуск'
+        self.in_text.save()
+        self.in_comment.delete()
+        self.assertEqual(self.found('подписка'), [])
+        self.assertEqual(self.found('отпуска'), [self.in_text])
+
+    def test_comment_indexed_alone(self):
+        """Новый комментарий индексируется сам, без текста поста
+        и прежних комментариев."""
+        with mock.patch.object(
+            search, 'stemmed', wraps=search.stemmed
+        ) as stemmed:
+            comment = Comment.objects.create(
+                post=self.in_text, author=self.author, text='Про отпуск'
+            )
+        stemmed.assert_called_once_with('Про отпуск')
+        self.assertEqual(self.found('отпуска'), [self.in_text])
+        comment.delete()
+        self.assertEqual(self.found('отпуска'), [])
+
+    def test_rebuild_command(self):
+        """bulk_create обходит сигналы; команда догоняет индекс."""
+        post, = Post.objects.bulk_create(
+            [Post(author=self.author, text='Массовая загрузка')]
+        )
+        self.assertEqual(self.found('загрузка'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(
+            [found.text for found in self.found('загрузка')], [post.text]
+        )
+        self.assertEqual(
+            self.found('подписка'), [self.in_text, self.in_comment]
+        )
+
+    def test_prefix_query(self):
+        self.assertEqual(self.found('журн'), [self.in_text])
+
+    def test_keyset_pages(self):
+        first = search.search('подписка', per_page=1)
+        self.assertEqual(list(first), [self.in_text])
+        self.assertIsNone(first.previous_cursor)
+        second = search.search('подписка', first.next_cursor, per_page=1)
+        self.assertEqual(list(second), [self.in_comment])
+        self.assertIsNone(second.next_cursor)
+        back = search.search('подписка', second.previous_cursor, per_page=1)
+        self.assertEqual(list(back), [self.in_text])
+
+    def test_search_view(self):
+        response = Client().get(reverse('posts:search'), {'q': 'Подписки'})
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.in_text, self.in_comment],
+        )
+
+    def test_admin_uses_index(self):
+        admin = Client()
+        admin.force_login(User.objects.create(
+            username='admin', is_staff=True, is_superuser=True
+        ))
+        response = admin.get(
+            reverse('admin:posts_post_changelist'), {'q': 'подписку'}
+        )
+        self.assertEqual(
+            set(response.context['cl'].result_list),
+            {self.in_text, self.in_comment},
+        )
@@ -0,0 +1,153 @@
+import io
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core import db_router
+from posts import thumbnails
+from posts.models import Post
+from posts.templatetags.post_images import responsive_image
+from yatube.settings import base as base_settings
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            author=User.objects.create(username='author'),
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+
+    def tearDown(self):
+        # Одинаковые картинки разных тестов — один файл с общими
+        # миниатюрами в кэше sorl: освобождаем их явно.
+        for post in Post.objects.all():
+            post.delete()
+            thumbnails.release(post.image.name)
+
+    def test_original_until_thumbnail_ready(self):
+        """Пока миниатюры нет, шаблон получает адрес оригинала и не
+        ставит задач: миниатюры строятся после сохранения поста."""
+        self.assertIsNone(thumbnails.get_ready(self.post.image, 'post'))
+        with mock.patch.object(thumbnails, '_submit') as submit:
+            self.assertEqual(responsive_image(self.post, 'post')['src'],
+                             self.post.image.url)
+        submit.assert_not_called()
+
+    def test_background_pool_by_default(self):
+        """По умолчанию миниатюры строятся в пуле, а не в запросе."""
+        self.assertGreater(base_settings.THUMBNAIL_WORKERS, 0)
+        with override_settings(THUMBNAIL_WORKERS=1):
+            self.assertIsNotNone(thumbnails.get_executor())
+
+    def test_build_thumbnails_command(self):
+        """Команда догоняет посты без миниатюр."""
+        out = StringIO()
+        call_command('build_thumbnails', stdout=out)
+        self.assertIn('Построено: 1', out.getvalue())
+        self.assertIsNotNone(thumbnails.get_srcset(self.post.image, 'post'))
+
+    def test_generated_thumbnail_is_read_from_store(self):
+        """После фоновой обработки шаблон берёт готовую миниатюру."""
+        thumbnails._generate(self.post.pk, self.post.image.name)
+        thumbnail = thumbnails.get_ready(self.post.image, 'post')
+        self.assertIsNotNone(thumbnail)
+        self.assertEqual(
+            responsive_image(self.post, 'post')['src'], thumbnail.url
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.version, 2)
+
+    @override_settings(REPLICA_DATABASES=['replica'])
+    def test_background_job_reads_primary(self):
+        """Фоновая задача читает посты из основной базы, а не с реплики,
+        которая могла ещё не получить новый пост."""
+        # Транзакция теста сама держит чтения в основной базе; поток пула
+        # работает вне транзакции.
+        outside_transaction = mock.patch.object(
+            db_router, 'connections',
+            {DEFAULT_DB_ALIAS: mock.Mock(in_atomic_block=False)},
+        )
+        with outside_transaction, mock.patch.object(
+            thumbnails, 'invalidate_post'
+        ) as invalidate:
+            thumbnails._generate(self.post.pk, self.post.image.name)
+        invalidate.assert_called_once_with(self.post)
+
+    def test_srcset_lists_every_width(self):
+        """Варианты строятся вместе с миниатюрой и попадают в srcset."""
+        context = responsive_image(self.post, 'post')
+        self.assertEqual(context['src'], self.post.image.url)
+        self.assertNotIn('srcset', context)
+        thumbnails._generate(self.post.pk, self.post.image.name)
+        context = responsive_image(self.post, 'post')
+        for width in (*settings.THUMBNAIL_WIDTHS, 960):
+            self.assertIn(f' {width}w', context['srcset'])
+        self.assertEqual(
+            [source['type'] for source in context['sources']],
+            [thumbnails.MIME_TYPES[image_format]
+             for image_format in thumbnails.FORMATS[:-1]],
+        )
+
+    def test_profile_lists_variants(self):
+        """Лента профиля тоже отдаёт картинки с srcset."""
+        thumbnails._generate(self.post.pk, self.post.image.name)
+        cache.clear()
+        response = self.client.get(
+            reverse('posts:profile', args=[self.post.author.username])
+        )
+        self.assertContains(response, 'srcset=')
+        self.assertContains(response, '<picture>')
+
+    def test_original_is_stripped_of_metadata(self):
+        """EXIF убирается из оригинала, а поворот из него применяется."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010E] = 'Координаты съёмки'
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 20)).save(buffer, 'JPEG', exif=exif.tobytes())
+        post = Post.objects.create(
+            author=self.post.author,
+            text='Фото с телефона',
+            image=SimpleUploadedFile(
+                'photo.jpg', buffer.getvalue(), 'image/jpeg'
+            ),
+        )
+        name = post.image.name
+        thumbnails._generate(post.pk, name)
+        # Очищенная копия — другое содержимое, а значит и другое имя.
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, name)
+        self.assertFalse(post.image.storage.exists(name))
+        with post.image.open() as file, Image.open(file) as image:
+            self.assertNotIn('exif', image.info)
+            self.assertEqual(image.size, (20, 40))
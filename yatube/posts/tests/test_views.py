@@ -1,9 +1,14 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.models import Group, Post, Follow, Comment
+from posts.views import NUMBER_COMMENTS
 from django.core.cache import cache
+from core.paginator import NEXT, dump_cursor
+
 User = get_user_model()
 
 POSTS = 10
@@ -37,6 +42,7 @@ class PostPagesTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         # Неавторизованный клиент
         self.guest_client = Client()
         # Авторизованный клиент, не автор
@@ -181,19 +187,56 @@ class PostPagesTests(TestCase):
         self.assertFalse(follow_exist)
 
     def test_cache_index_page_correct_context(self):
-        """Кэш index сформирован с правильным контекстом."""
+        """Кэш index хранит страницу до изменения постов."""
+        cache.clear()
         response = self.authorized_client.get(reverse('posts:main'))
         content = response.content
-        post_id = PostPagesTests.post.id
-        instance = Post.objects.get(pk=post_id)
-        instance.delete()
+        # update() не посылает сигналов: страница остаётся в кэше.
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
         new_response = self.authorized_client.get(reverse('posts:main'))
-        new_content = new_response.content
-        self.assertEqual(content, new_content)
-        cache.clear()
+        self.assertEqual(content, new_response.content)
+        Post.objects.get(pk=self.post.pk).delete()
         new_new_response = self.authorized_client.get(reverse('posts:main'))
-        new_new_content = new_new_response.content
-        self.assertNotEqual(content, new_new_content)
+        self.assertNotEqual(content, new_new_response.content)
+        self.assertNotContains(new_new_response, 'Тихая правка')
+
+    def test_edit_invalidates_post_fragment(self):
+        """Редактирование поста обновляет его кэшированный фрагмент."""
+        cache.clear()
+        url = reverse('posts:group_posts', kwargs={'slug': self.group.slug})
+        self.assertContains(self.guest_client.get(url), self.post.text)
+        self.post_author.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'Исправленный текст', 'group': self.group.id}
+        )
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Исправленный текст')
+        self.assertNotContains(response, self.post.text)
+
+    def test_conditional_get(self):
+        """Повторный запрос без изменений получает 304, после — 200."""
+        urls = (
+            reverse('posts:main'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertIn('Last-Modified', response)
+                etag = response['ETag']
+                repeated = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(repeated.status_code, 304)
+                Comment.objects.create(
+                    post=self.post, author=self.user_author, text='Новый'
+                )
+                Post.objects.create(author=self.user_author, text='Новый пост')
+                changed = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(changed.status_code, 200)
+                self.assertNotEqual(changed['ETag'], etag)
 
 
 class PaginatorViewsTest(TestCase):
@@ -225,3 +268,153 @@ class PaginatorViewsTest(TestCase):
                 self.assertEqual(
                     len(response.context.get('page_obj').object_list), POSTS
                 )
+
+    def test_cursor_pagination(self):
+        """Курсор ведёт на следующую страницу и обратно."""
+        cache.clear()
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'extra {i}') for i in range(3)
+        )
+        first_page = self.client.get(reverse('posts:main')).context['page_obj']
+        self.assertEqual(len(first_page), POSTS)
+        self.assertIsNone(first_page.previous_cursor)
+        second_page = self.client.get(
+            reverse('posts:main'), {'cursor': first_page.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(len(second_page), 3)
+        self.assertIsNone(second_page.next_cursor)
+        self.assertFalse(
+            set(first_page.object_list) & set(second_page.object_list)
+        )
+        back_page = self.client.get(
+            reverse('posts:main'), {'cursor': second_page.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(back_page.object_list, first_page.object_list)
+
+    def test_garbage_cursor_gives_first_page(self):
+        """Испорченный курсор ведёт на первую страницу, а не в ошибку."""
+        cache.clear()
+        first_page = self.client.get(reverse('posts:main')).context['page_obj']
+        for cursor in (
+            dump_cursor(NEXT, [None, None]),
+            dump_cursor(NEXT, [{}, 1]),
+            dump_cursor(NEXT, [[], 'x']),
+            'не-base64',
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    reverse('posts:main'), {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.context['page_obj'].object_list,
+                    first_page.object_list,
+                )
+
+    def test_page_number_compatibility(self):
+        """Старые ссылки ?page= продолжают работать."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'extra {i}') for i in range(3)
+        )
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+            {'page': 2}
+        )
+        self.assertEqual(len(response.context['page_obj']), 3)
+        self.assertEqual(response.context['page_obj'].number, 2)
+
+    def test_page_range_is_elided(self):
+        """Навигация показывает края и соседей текущей страницы."""
+        cache.clear()
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'extra {i}')
+            for i in range(POSTS * 29)
+        )
+        response = self.client.get(reverse('posts:main'), {'page': 15})
+        paginator = response.context['page_obj'].paginator
+        self.assertEqual(
+            list(paginator.get_elided_page_range(15)),
+            [1, paginator.ELLIPSIS, 13, 14, 15, 16, 17, paginator.ELLIPSIS,
+             30],
+        )
+        for page in (1, 13, 17, 30):
+            self.assertContains(response, f'href="?page={page}"')
+        self.assertNotContains(response, 'href="?page=5"')
+        self.assertContains(response, paginator.ELLIPSIS, count=2)
+
+
+class QueryBudgetTests(TestCase):
+    """Число запросов ленты не зависит от числа постов на странице."""
+    # Сессия, пользователь, объект страницы, посты, счётчики профиля.
+    BUDGET = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username='reader')
+        for number in range(POSTS):
+            author = User.objects.create(username=f'author{number}')
+            group = Group.objects.create(
+                title=f'Группа {number}', slug=f'group-{number}'
+            )
+            Follow.objects.create(user=cls.reader, author=author)
+            Post.objects.create(author=author, group=group, text=str(number))
+        cls.author = author
+        cls.group = group
+        Post.objects.bulk_create(
+            Post(author=author, group=group, text=f'ещё {number}')
+            for number in range(POSTS)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_feed_query_budget(self):
+        urls = (
+            reverse('posts:main'),
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(len(response.context['page_obj']), POSTS)
+                self.assertLessEqual(len(queries), self.BUDGET)
+
+    def test_comments_query_budget(self):
+        """Комментарии грузятся вместе с авторами и порциями."""
+        post = self.author.posts.first()
+        Comment.objects.bulk_create(
+            Comment(post=post, author=self.reader, text=str(number))
+            for number in range(NUMBER_COMMENTS + 5)
+        )
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['comment']), NUMBER_COMMENTS)
+        self.assertLessEqual(len(queries), self.BUDGET)
+        more = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': post.pk}),
+            {'cursor': response.context['comment'].next_cursor},
+        )
+        self.assertEqual(len(more.context['comment']), 5)
+        self.assertIsNone(more.context['comment'].next_cursor)
+        self.assertNotContains(more, 'comments-more')
+
+    def test_new_comment_on_first_page(self):
+        """Новый комментарий виден сразу, сколько бы их ни было до него."""
+        post = self.author.posts.first()
+        Comment.objects.bulk_create(
+            Comment(post=post, author=self.author, text=str(number))
+            for number in range(NUMBER_COMMENTS + 5)
+        )
+        self.client.force_login(self.reader)
+        response = self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Свежий комментарий'}, follow=True,
+        )
+        self.assertEqual(
+            response.context['comment'][0].text, 'Свежий комментарий'
+        )
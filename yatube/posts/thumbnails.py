@@ -0,0 +1,242 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+Миниатюры всех пресетов ``THUMBNAIL_PRESETS`` строятся в пуле из
+``THUMBNAIL_WORKERS`` потоков после сохранения поста, а шаблоны только
+читают готовые адреса из хранилища ключей sorl. Пока миниатюры нет,
+шаблон показывает оригинал; запрос не ждёт PIL. Посты, для которых
+миниатюры не строились (старые или после очистки кэша sorl), догоняет
+команда build_thumbnails.
+
+Для ``srcset`` у каждого пресета строятся варианты шириной
+``THUMBNAIL_WIDTHS`` в WebP (если Pillow собран с ним) и в JPEG.
+
+Оригиналы лежат в хранилище по хэшу содержимого: одинаковые картинки
+разных постов — один файл с одним набором миниатюр. ``release``
+удаляет файл и миниатюры, когда на него не осталось ссылок.
+"""
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models import F, Q
+from PIL import Image, ImageOps, features
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import db_router, metrics
+from core.storage import is_hashed_name, lock, unlock
+from .caching import invalidate_post
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_pending = set()
+_pending_lock = threading.Lock()
+
+# Браузеры без WebP получат JPEG из <img srcset>.
+FORMATS = ('WEBP', 'JPEG') if features.check('webp') else ('JPEG',)
+MIME_TYPES = {'WEBP': 'image/webp', 'JPEG': 'image/jpeg'}
+
+# Оригиналы этих форматов пересохраняются без метаданных (EXIF может
+# содержать координаты съёмки); GIF с анимацией не трогаем.
+REENCODE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+}
+METADATA_KEYS = {'exif', 'comment', 'XML:com.adobe.xmp'}
+
+storage = Post._meta.get_field('image').storage
+
+
+def get_variants(preset):
+    """Варианты пресета: (формат, ширина, геометрия, опции sorl)."""
+    geometry, options = settings.THUMBNAIL_PRESETS[preset]
+    width, height = map(int, geometry.split('x'))
+    widths = sorted(
+        {w for w in settings.THUMBNAIL_WIDTHS if w < width} | {width}
+    )
+    return [
+        (
+            image_format, variant_width,
+            f'{variant_width}x{round(height * variant_width / width)}',
+            {**options, 'format': image_format},
+        )
+        for image_format in FORMATS
+        for variant_width in widths
+    ]
+
+
+def get_ready(image, preset):
+    """Готовая миниатюра пресета или None, без обращения к PIL."""
+    geometry, options = settings.THUMBNAIL_PRESETS[preset]
+    return _get_ready(image, geometry, options)
+
+
+def get_srcset(image, preset):
+    """Значения srcset по форматам или None, пока готовы не все варианты."""
+    srcset = {}
+    for image_format, width, geometry, options in get_variants(preset):
+        thumbnail = _get_ready(image, geometry, options)
+        if thumbnail is None:
+            return None
+        srcset.setdefault(image_format, []).append(
+            f'{thumbnail.url} {width}w'
+        )
+    return {
+        image_format: ', '.join(urls) for image_format, urls in srcset.items()
+    }
+
+
+def _get_ready(image, geometry, options):
+    backend = default.backend
+    source = ImageFile(image)
+    # Те же умолчания, что в ThumbnailBackend.get_thumbnail: от них
+    # зависит имя файла миниатюры.
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(source, geometry, options)
+    return default.kvstore.get(ImageFile(name, default.storage))
+
+
+def schedule(post):
+    """Поставить миниатюры поста в очередь после фиксации транзакции."""
+    if post.image:
+        key = (post.pk, post.image.name)
+        transaction.on_commit(lambda: _submit(key))
+
+
+def get_executor():
+    """Пул потоков, создаётся при первой задаче.
+
+    При THUMBNAIL_WORKERS = 0 пула нет: миниатюры строятся сразу
+    в вызывающем потоке (команды и скрипты, не запросы).
+    """
+    global _executor
+    if not settings.THUMBNAIL_WORKERS:
+        return None
+    with _pending_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    return _executor
+
+
+def _submit(key):
+    executor = get_executor()
+    if executor is None:
+        _generate(*key)
+        return
+    with _pending_lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+    executor.submit(_run_in_worker, *key)
+
+
+def _run_in_worker(post_id, name):
+    try:
+        _generate(post_id, name)
+    finally:
+        with _pending_lock:
+            _pending.discard((post_id, name))
+        connections.close_all()
+
+
+def release(name):
+    """Удалить оригинал и его миниатюры, если ни один пост на него
+    не ссылается.
+
+    Файлы со старыми (не хэшированными) именами не трогаем. Проверка
+    и удаление идут под блокировкой имени: загрузка того же содержимого
+    дождётся конца транзакции и либо увидит ссылку, либо запишет файл
+    заново.
+    """
+    if not name or not is_hashed_name(name):
+        return
+    with transaction.atomic():
+        lock(name)
+        if Post.objects.filter(image=name).exists():
+            return
+        default.backend.delete(ImageFile(name, storage))
+        unlock(name)
+
+
+def strip_metadata(name):
+    """Пересохранить оригинал без метаданных, повернув по EXIF.
+
+    Идёт в фоне вместе с миниатюрами, поэтому полное декодирование
+    картинки не задерживает запрос с загрузкой. Новое содержимое —
+    новое имя в хранилище; возвращает имя, под которым лежит результат.
+    """
+    with storage.open(name) as file:
+        image = Image.open(file)
+        image_format = image.format
+        if image_format not in REENCODE_OPTIONS or not (
+            METADATA_KEYS & set(image.info) or getattr(image, 'text', None)
+        ):
+            return name
+        icc_profile = image.info.get('icc_profile')
+        image = ImageOps.exif_transpose(image)
+        buffer = io.BytesIO()
+        image.save(
+            buffer, image_format, icc_profile=icc_profile,
+            **REENCODE_OPTIONS[image_format],
+        )
+    return storage.save(name, ContentFile(buffer.getvalue(), name))
+
+
+def _strip_and_rename(name):
+    """Перевести посты на очищенную копию оригинала.
+
+    Копия сохраняется и подставляется в посты в одной транзакции:
+    до ссылки из постов её нельзя удалить.
+    """
+    with transaction.atomic():
+        new_name = strip_metadata(name)
+        if new_name == name:
+            return name
+        Post.objects.filter(image=name).update(image=new_name)
+    release(name)
+    return new_name
+
+
+def _generate(post_id, name):
+    # Задача приходит сразу после фиксации поста: реплика могла его ещё
+    # не получить, и тогда сбрасывать было бы нечего.
+    with db_router.primary():
+        try:
+            _build(post_id, name)
+        except Exception:
+            logger.exception('Не удалось подготовить миниатюры %s', name)
+
+
+def _build(post_id, name):
+    with metrics.timed('thumbnails'):
+        name = _strip_and_rename(name)
+        source = ImageFile(name, storage)
+        for preset, (geometry, options) in \
+                settings.THUMBNAIL_PRESETS.items():
+            get_thumbnail(source, geometry, **options)
+            for *_, geometry, options in get_variants(preset):
+                get_thumbnail(source, geometry, **options)
+    # Фрагменты и страницы с картинкой были отрисованы с оригиналом.
+    posts = Post.objects.filter(Q(pk=post_id) | Q(image=name))
+    posts.update(version=F('version') + 1)
+    for post in posts:
+        invalidate_post(post)
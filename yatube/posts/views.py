@@ -1,22 +1,29 @@
-from django.core.paginator import Paginator
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Post, Group, Follow
+from .models import Comment, Post, Group
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
 from posts.forms import PostForm, CommentForm
-from django.views.decorators.cache import cache_page
+from core.paginator import KeysetPaginator, get_page
+from posts.caching import (
+    GROUP, INDEX, PROFILE, cache_page_by_generation, condition_by_generation,
+    post_scopes
+)
+from posts import follows
+from posts.feeds import get_feed_page
+from posts.search import search as search_posts
+from posts.stats import get_stats
 
 NUMBER_POSTS = 10
-CACHE_SECOND = 20
+NUMBER_COMMENTS = 20
+# Страницы сбрасываются сигналами, TTL лишь освобождает место в кэше.
+CACHE_TIMEOUT = 60 * 60 * 6
 
 
-@cache_page(CACHE_SECOND)
+@cache_page_by_generation(INDEX, timeout=CACHE_TIMEOUT)
 def index(request):
     title = 'Последние обновления на сайте'
-    post_list = Post.objects.select_related('group').all()
-    paginator = Paginator(post_list, NUMBER_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed()
+    page_obj = get_page(request, post_list, NUMBER_POSTS)
     context = {
         'page_obj': page_obj,
         'title': title,
@@ -25,12 +32,11 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@cache_page_by_generation(GROUP, timeout=CACHE_TIMEOUT)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, NUMBER_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed().filter(group=group)
+    page_obj = get_page(request, post_list, NUMBER_POSTS)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -38,18 +44,17 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@cache_page_by_generation(PROFILE, timeout=CACHE_TIMEOUT)
 def profile(request, username):
     title = username + ' профайл пользователя'
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    paginator = Paginator(posts, NUMBER_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    post_number = posts.count()
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author=author).exists()
+    posts = Post.objects.for_feed().filter(author=author)
+    page_obj = get_page(request, posts, NUMBER_POSTS)
+    author_stats = get_stats(author)
+    following = follows.is_following(request.user, author)
     context = {
-        'post_number': post_number,
+        'post_number': author_stats.post_count,
+        'author_stats': author_stats,
         'page_obj': page_obj,
         'author': author,
         'title': title,
@@ -58,25 +63,48 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@condition_by_generation(post_scopes)
 def post_detail(request, post_id):
     form = CommentForm(request.POST or None)
-    post = get_object_or_404(Post, id=post_id)
-    get_user_object = User.objects.get(id=post.author_id)
-    user = get_user_object.username
-    post_list = Post.objects.filter(author=get_user_object)
-    posts_count = post_list.count()
-    comments = post.comments.all()
+    post = get_object_or_404(Post.objects.for_feed(), id=post_id)
+    user = post.author.username
+    posts_count = get_stats(post.author).post_count
     context = {
         'username': user,
         'post': post,
         'posts_count': posts_count,
         'form': form,
         'post_view': True,
-        'comment': comments,
+        'comment': get_comments_page(post.pk),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def get_comments_page(post_id, cursor=None):
+    """Страница комментариев поста с авторами, по ключу (created, id).
+
+    Сначала новые: только что оставленный комментарий виден сразу под
+    формой, а «Ещё» подгружает более ранние.
+    """
+    comments = Comment.objects.filter(
+        post_id=post_id
+    ).select_related('author')
+    paginator = KeysetPaginator(
+        comments, NUMBER_COMMENTS, keys=('-created', '-id')
+    )
+    return paginator.get_cursor_page(cursor)
+
+
+def post_comments(request, post_id):
+    """Фрагмент со следующей порцией комментариев (кнопка «Ещё»)."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    context = {
+        'post': post,
+        'comment': get_comments_page(post.pk, request.GET.get('cursor')),
+    }
+    return render(request, 'includes/comment_list.html', context)
+
+
 @login_required
 def post_create(request):
     template_name = 'posts/create_post.html'
@@ -130,27 +158,31 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     """Информация о текущем пользователе доступна в переменной request.user."""
-    follow_posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(follow_posts, NUMBER_POSTS)
-    page_number = request.GET.get('page_obj')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_feed_page(request, NUMBER_POSTS)
     context = {
-        'paginator': paginator,
+        'paginator': page_obj.paginator,
         'page_obj': page_obj,
     }
     return render(request, "posts/follow.html", context)
 
 
+def search(request):
+    """Поиск по текстам постов и комментариям."""
+    query = request.GET.get('q', '').strip()
+    page_obj = search_posts(query, request.GET.get('cursor'), NUMBER_POSTS)
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+        'title': f'Поиск: {query}' if query else 'Поиск',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def profile_follow(request, username):
     """Подписаться на автора."""
     author = get_object_or_404(User, username=username)
-    user = request.user
-    if (
-        author != request.user and not
-        Follow.objects.filter(author=author, user=user).exists()
-    ):
-        Follow.objects.create(user=user, author=author)
+    follows.follow(request.user, author)
     return redirect('posts:profile', username)
 
 
@@ -158,5 +190,5 @@ def profile_follow(request, username):
 def profile_unfollow(request, username):
     """Дизлайк, отписка."""
     author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    follows.unfollow(request.user, author)
     return redirect('posts:profile', username=author.username)
@@ -0,0 +1,22 @@
+"""Настройки выбираются переменной окружения DJANGO_ENV.
+
+``dev`` (по умолчанию) — разработка, ``test`` — тесты, ``prod`` — боевой
+запуск (его же по умолчанию берёт ``yatube.wsgi``).
+Модуль можно указать и напрямую: ``yatube.settings.prod``.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+ENVIRONMENT = os.environ.get('DJANGO_ENV', 'dev')
+
+if ENVIRONMENT == 'dev':
+    from .dev import *  # noqa: F401,F403
+elif ENVIRONMENT == 'test':
+    from .test import *  # noqa: F401,F403
+elif ENVIRONMENT == 'prod':
+    from .prod import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(
+        f'DJANGO_ENV={ENVIRONMENT!r}: ожидается dev, test или prod.'
+    )
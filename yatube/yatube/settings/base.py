@@ -0,0 +1,236 @@
+"""
+Django settings for yatube project: общая часть для dev и prod.
+
+Generated by 'django-admin startproject' using Django 2.2.19.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+"""
+
+import os
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'gj*-zec7*8d1-h1b!5dbjrrm!skv0k5jg))rdq2wlso)()66#q'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'posts.apps.PostsConfig',  # Добавленная запись
+    'users.apps.UsersConfig',  # Добавленная запись
+    'core.apps.CoreConfig',  # Добавленная запись
+    'about.apps.AboutConfig',  # Добавленная запись
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',   # Добавлено
+]
+
+MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'core.template_backends.TimedDjangoTemplates',
+        'DIRS': [os.path.join(BASE_DIR, 'templates')],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+# Сколько секунд соединение ждёт блокировку записи, прежде чем
+# получить «database is locked».
+SQLITE_TIMEOUT = 20
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'OPTIONS': {'timeout': SQLITE_TIMEOUT},
+    }
+}
+
+# Реплики только для чтения: пути к файлам SQLite через запятую
+# в DATABASE_REPLICAS. Локально их обновляет команда sync_replicas.
+REPLICA_DATABASES = []
+for number, path in enumerate(
+    filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'OPTIONS': {'timeout': SQLITE_TIMEOUT},
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica{number}')
+
+# PRAGMA, которые core.sqlite выставляет каждому новому соединению
+# SQLite (имя -> значение). WAL: запись не блокирует чтение, а с ним
+# synchronous=NORMAL теряет при сбое питания лишь последние транзакции.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': SQLITE_TIMEOUT * 1000,
+    # Страницы файла читаются через mmap, без копирования в кэш SQLite.
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер кэша страниц в КиБ.
+    'cache_size': -32 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+# Сколько секунд после записи сессия читает только из основной базы,
+# чтобы автор сразу видел свой пост или комментарий.
+REPLICA_STICKY_SECONDS = 10
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:main'
+# LOGOUT_REDIRECT_URL = 'posts:main'
+
+#  подключаем движок filebased.EmailBackend
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# указываем директорию, в которую будут складываться файлы писем
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Общий для всех воркеров узла кэш: файл SQLite в режиме WAL.
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache_backends.sqlite.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    }
+}
+
+# Авторы, у которых подписчиков больше, не раскладываются по лентам
+# подписчиков при публикации: их посты подмешиваются при чтении ленты.
+FEED_FANOUT_LIMIT = 1000
+
+# Загрузки сразу пишутся во временный файл по частям, а не в память;
+# файл больше MAX_UPLOAD_SIZE перестаёт приниматься на середине.
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.SizeLimitUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+# Временный файл создаётся с правами 0600 и переносится в MEDIA как
+# есть: без явных прав веб-сервер не сможет его отдать.
+FILE_UPLOAD_PERMISSIONS = 0o644
+FILE_UPLOAD_DIRECTORY_PERMISSIONS = 0o755
+# Предел для картинок постов; проверяется по заголовку файла.
+MAX_IMAGE_PIXELS = 40 * 10 ** 6
+
+# Миниатюры, которые готовятся в фоне после сохранения поста:
+# имя пресета -> (геометрия, опции sorl-thumbnail).
+THUMBNAIL_PRESETS = {
+    'post': ('960x339', {'padding': True, 'upscale': True, 'quality': 80}),
+}
+# Ширины вариантов пресетов для srcset (высота — в пропорции пресета).
+THUMBNAIL_WIDTHS = (320, 480, 720)
+# Размер пула потоков, в котором строятся миниатюры; 0 — строить
+# в потоке, сохранившем пост (только для команд и скриптов: запрос
+# с загрузкой будет ждать PIL).
+THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', 2))
+
+# Сколько последних запросов каждого view хранит статистика
+# /admin/metrics/ (core.middleware.RequestMetricsMiddleware).
+REQUEST_METRICS_WINDOW = 1000
@@ -0,0 +1,4 @@
+"""Разработка: отладочные страницы, MEDIA отдаёт runserver."""
+from .base import *  # noqa: F401,F403
+
+DEBUG = True
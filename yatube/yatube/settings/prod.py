@@ -0,0 +1,46 @@
+"""Боевой запуск: DJANGO_ENV=prod.
+
+Секретный ключ и адреса сайта берутся из окружения
+(DJANGO_SECRET_KEY, DJANGO_ALLOWED_HOSTS через запятую).
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import ALLOWED_HOSTS, CACHES, DATABASES, TEMPLATES
+
+# Без DEBUG Django не копит выполненные запросы в connection.queries.
+DEBUG = False
+
+try:
+    SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+except KeyError:
+    raise ImproperlyConfigured('Не задан DJANGO_SECRET_KEY.') from None
+
+# Пустая переменная или лишняя запятая не дают хоста ''.
+ALLOWED_HOSTS = [
+    host.strip() for host in os.environ.get(
+        'DJANGO_ALLOWED_HOSTS', ','.join(ALLOWED_HOSTS)
+    ).split(',') if host.strip()
+]
+
+# Соединения с базой живут между запросами воркера.
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = int(os.environ.get('CONN_MAX_AGE', 600))
+
+# Кэш общий для всех воркеров узла (файл SQLite), путь можно вынести,
+# например, в tmpfs.
+CACHES['default']['LOCATION'] = os.environ.get(
+    'CACHE_LOCATION', CACHES['default']['LOCATION']
+)
+
+# Шаблоны разбираются один раз за жизнь воркера; yatube.wsgi
+# компилирует их заранее, при старте.
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
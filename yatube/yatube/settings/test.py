@@ -0,0 +1,19 @@
+"""Тесты: DJANGO_ENV=test (manage.py test выбирает его сам).
+
+Миниатюры строятся сразу, в потоке теста: фоновый пул писал бы файлы
+в MEDIA_ROOT, который тест уже удаляет. Кэш лежит во временном
+каталоге: cache.clear() в тестах не трогает кэш разработчика.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+from .dev import *  # noqa: F401,F403
+from .dev import CACHES
+
+THUMBNAIL_WORKERS = 0
+
+CACHE_DIR = tempfile.mkdtemp(prefix='yatube-cache-')
+atexit.register(shutil.rmtree, CACHE_DIR, ignore_errors=True)
+CACHES['default']['LOCATION'] = os.path.join(CACHE_DIR, 'cache.sqlite3')
@@ -16,15 +16,19 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import request_metrics, serve_media
+
 from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
+    path('admin/metrics/', request_metrics, name='request_metrics'),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('api/v1/', include('posts.api_urls', namespace='api')),
 ]
 
 handler404 = 'core.views.page_not_found'
@@ -33,5 +37,5 @@ handler403 = 'core.views.permission_denied'
 
 if settings.DEBUG:
     urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
+        settings.MEDIA_URL, serve_media, document_root=settings.MEDIA_ROOT
     )
@@ -12,5 +12,14 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+# WSGI-сервер — это боевой запуск: без DJANGO_ENV не включаем DEBUG
+# и не берём ключ из репозитория.
+os.environ.setdefault('DJANGO_ENV', 'prod')
 
 application = get_wsgi_application()
+
+# С кэширующим загрузчиком (prod) шаблоны разбираются
+# сейчас, при старте воркера, а не на первых запросах.
+from core.template_loading import warm  # noqa: E402
+
+warm()